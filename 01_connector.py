@@ -2,59 +2,37 @@ import streamlit as st
 import ibis
 import json
 import pyodbc
-import duckdb
 import pandas as pd
 from pathlib import Path
 from typing import Optional, Dict, Any
 import os
-
-def detect_delimiter(file_path: str) -> str:
-    """Detect the delimiter in a CSV file"""
+import profiler
+from connection_pool import evict_connection
+from file_sources import FILE_SOURCE_TYPE, file_reader, source_view_name, matching_files
+from flatfile_import import (
+    FLATFILES_DB, CSV_SAMPLE_SIZE, IMPORT_WORKERS, csv_table_name, sniff_csv, preview_csv, import_csv,
+    get_rejected_rows, find_flat_files, import_csv_files
+)
+
+@st.cache_data(show_spinner="Detecting CSV format...")
+def get_csv_format(file_path: str, modified: float, sample_size: int) -> Optional[Dict[str, Any]]:
+    """Sniff the dialect of a CSV file; modified keeps the cache fresh when the file changes"""
     try:
-        # Read first few lines of the file
-        with open(file_path, 'r') as file:
-            sample = file.readline() + file.readline()
-        
-        # Count potential delimiters
-        delimiters = {
-            ',': sample.count(','),
-            ';': sample.count(';'),
-            '\t': sample.count('\t'),
-            '|': sample.count('|')
-        }
-        
-        # Return the delimiter with highest count
-        return max(delimiters.items(), key=lambda x: x[1])[0]
+        return sniff_csv(file_path, sample_size)
     except Exception as e:
-        st.error(f"Error detecting delimiter: {str(e)}")
-        return ','
+        st.error(f"Error detecting CSV format: {str(e)}")
+        return None
 
-def preview_csv(file_path: str, delimiter: str, quotechar: str, has_header: bool) -> pd.DataFrame:
-    """Preview first 5 rows of CSV file"""
+@st.cache_data(show_spinner="Reading preview...")
+def get_csv_preview(file_path: str, modified: float, delimiter: str, quotechar: str, has_header: bool,
+                    sample_size: int):
+    """Preview first 5 rows of CSV file with the column types DuckDB detects"""
     try:
-        df = pd.read_csv(
-            file_path,
-            delimiter=delimiter,
-            quotechar=quotechar,
-            header=0 if has_header else None,
-            nrows=5
-        )
-        return df
+        return preview_csv(file_path, delimiter, quotechar, has_header, sample_size)
     except Exception as e:
         st.error(f"Error previewing CSV: {str(e)}")
         return None
 
-def get_column_types(df: pd.DataFrame) -> Dict[str, str]:
-    """Get column types from DataFrame"""
-    type_mapping = {
-        'int64': 'INTEGER',
-        'float64': 'DOUBLE',
-        'object': 'VARCHAR',
-        'bool': 'BOOLEAN',
-        'datetime64[ns]': 'TIMESTAMP'
-    }
-    return {col: type_mapping.get(str(df[col].dtype), 'VARCHAR') for col in df.columns}
-
 def load_backend_configs() -> Dict[str, Dict[str, Any]]:
     """Load backend configurations from backends.json"""
     with open("backends.json", "r") as f:
@@ -85,6 +63,7 @@ def delete_connection(name: str) -> None:
         del connections[name]
         with open("connections.json", "w") as f:
             json.dump(connections, f, indent=4)
+    evict_connection(name)
 
 def rename_connection(old_name: str, new_name: str) -> None:
     """Rename a saved connection"""
@@ -96,6 +75,7 @@ def rename_connection(old_name: str, new_name: str) -> None:
         connections[new_name] = connections.pop(old_name)
         with open("connections.json", "w") as f:
             json.dump(connections, f, indent=4)
+    evict_connection(old_name)
 
 def get_connection_params(db_type: str) -> Dict[str, Any]:
     """Return connection parameters based on database type from backends.json"""
@@ -103,18 +83,117 @@ def get_connection_params(db_type: str) -> Dict[str, Any]:
     return backends.get(db_type, {})
 
 def create_connection(db_type: str, params: Dict[str, Any]) -> Optional[ibis.BaseBackend]:
-    """Create database connection using Ibis"""
-    try:
-        connection_method = getattr(ibis, db_type.lower())
+    """Create database connection using Ibis, reporting errors on the page"""
+    return profiler.create_connection(db_type, params, notify=lambda level, message: getattr(st, level)(message))
+
+def show_bulk_csv_import():
+    """Import every new CSV file of a directory or glob, one table per file schema"""
+    pattern = st.text_input(
+        "Directory or glob",
+        help="A folder, searched with its subfolders, or a pattern such as /drops/2026-10-*/**/*.csv"
+    )
+    if not pattern:
+        return
+    
+    files = find_flat_files(pattern)
+    if not files:
+        st.error("No CSV files found. Please check the directory or pattern and try again.")
+        return
+    st.write(f"{len(files):,} CSV file(s) found")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        sample_size = int(st.number_input(
+            "Rows sampled per file to detect the format",
+            min_value=1,
+            value=CSV_SAMPLE_SIZE,
+            step=10_000,
+            key="bulk_sample_size"
+        ))
+    with col2:
+        workers = int(st.number_input(
+            "Tables imported in parallel",
+            min_value=1,
+            value=IMPORT_WORKERS,
+            key="bulk_workers"
+        ))
+    
+    if st.button("Import Files", type="primary"):
+        try:
+            import_progress = st.progress(0.0, "Starting import...")
+            result = import_csv_files(pattern, sample_size, workers, progress_bar=import_progress)
+        except Exception as e:
+            st.error(f"Error importing files: {str(e)}")
+            return
         
-        # For databases that only need a path parameter, pass the path string directly
-        if len(params) == 1 and "path" in params:
-            return connection_method.connect(params["path"])
-            
-        return connection_method.connect(**params)
-    except Exception as e:
-        st.error(f"Connection error: {str(e)}")
-        return None
+        # Store DuckDB parameters
+        st.session_state.connection_params = {"path": FLATFILES_DB}
+        for group in result['groups']:
+            if 'error' in group:
+                st.error(f"Error importing {group['files']} file(s) into {group['table_name']}: {group['error']}")
+        imported = [group for group in result['groups'] if 'error' not in group]
+        if imported:
+            st.success(
+                f"Imported {sum(group['files'] for group in imported):,} file(s) "
+                f"into {len(imported)} table(s)"
+            )
+            st.dataframe(
+                pd.DataFrame(imported),
+                column_config={
+                    "table_name": "Table",
+                    "files": st.column_config.NumberColumn("Files"),
+                    "rows": st.column_config.NumberColumn("Rows", format="%d"),
+                    "rejected_rows": st.column_config.NumberColumn("Rejected Rows", format="%d"),
+                    "seconds": st.column_config.NumberColumn("Seconds", format="%.1f"),
+                    "rows_per_second": st.column_config.NumberColumn("Rows/s", format="%.0f"),
+                    "mb_per_second": st.column_config.NumberColumn("MB/s", format="%.1f")
+                },
+                hide_index=True
+            )
+            if any(group['rejected_rows'] for group in imported):
+                st.warning("Rows that could not be read were stored in the <table>_rejects table of their table.")
+        if result['skipped']:
+            st.info(f"Skipped {len(result['skipped']):,} file(s) that were imported before")
+
+def show_file_source_editor() -> Dict[str, str]:
+    """Edit the files or globs of a file source; returns the view name of each path"""
+    st.caption(
+        "Parquet, CSV and JSON files are queried where they are, without importing them. "
+        "Each file or glob becomes a view, for example /data/orders/*.parquet."
+    )
+    sources = st.data_editor(
+        pd.DataFrame({'Path': pd.Series(dtype='str'), 'View': pd.Series(dtype='str')}),
+        column_config={
+            "Path": st.column_config.TextColumn("File or glob", required=True),
+            "View": st.column_config.TextColumn("View name", help="Defaults to the file or folder name")
+        },
+        num_rows="dynamic",
+        hide_index=True,
+        key="file_source_editor"
+    )
+    
+    params = {}
+    for path, view in sources[['Path', 'View']].itertuples(index=False):
+        if not isinstance(path, str) or not path.strip():
+            continue
+        path = path.strip()
+        name = view.strip() if isinstance(view, str) and view.strip() else source_view_name(path)
+        try:
+            file_reader(path)
+        except ValueError as e:
+            st.error(str(e))
+            continue
+        if name in params:
+            st.error(f"View name '{name}' is used more than once")
+            continue
+        
+        files = matching_files(path)
+        if files:
+            st.write(f"{name}: {len(files):,} file(s)")
+        else:
+            st.warning(f"No files match {path}")
+        params[name] = path
+    return params
 
 def main():
     st.title("Connection Manager")
@@ -134,7 +213,7 @@ def main():
 
     with tab1:
         backends = load_backend_configs()
-        db_options = sorted(list(backends.keys()) + ["CSV"])
+        db_options = sorted(list(backends.keys()) + ["CSV", FILE_SOURCE_TYPE])
 
         st.session_state.selected_db = st.selectbox(
             "Select a database system:",
@@ -151,15 +230,34 @@ def main():
             )
 
             if st.session_state.selected_db == "CSV":
-                file_path = st.text_input("CSV File Path", 
-                                        help="Provide the full path to your CSV file")
+                if st.toggle("Import a directory or glob of files", key="bulk_csv_import"):
+                    show_bulk_csv_import()
+                    file_path = ""
+                else:
+                    file_path = st.text_input("CSV File Path", 
+                                            help="Provide the full path to your CSV file")
                 
                 if file_path and os.path.exists(file_path):
                     # CSV Import Options
                     st.subheader("CSV Import Options")
                     
-                    # Detect delimiter
-                    detected_delimiter = detect_delimiter(file_path)
+                    # Sniff the dialect and column types from a sample of rows
+                    sniff_whole_file = st.checkbox(
+                        "Detect format from the whole file",
+                        value=False,
+                        help="Slower on large files, but types never have to be guessed from a sample"
+                    )
+                    sample_size = -1 if sniff_whole_file else int(st.number_input(
+                        "Rows sampled to detect the format",
+                        min_value=1,
+                        value=CSV_SAMPLE_SIZE,
+                        step=10_000
+                    ))
+                    sniffed = get_csv_format(file_path, os.path.getmtime(file_path), sample_size)
+                    if sniffed is None:
+                        sniffed = {'delimiter': ',', 'quotechar': '"', 'has_header': True}
+                    
+                    detected_delimiter = sniffed['delimiter']
                     delimiter_options = {
                         'Comma (,)': ',',
                         'Semicolon (;)': ';',
@@ -171,7 +269,7 @@ def main():
                     delimiter_choice = st.selectbox(
                         "Delimiter",
                         options=list(delimiter_options.keys()),
-                        index=list(delimiter_options.values()).index(detected_delimiter) if detected_delimiter in delimiter_options.values() else 0
+                        index=list(delimiter_options.values()).index(detected_delimiter) if detected_delimiter in delimiter_options.values() else 4
                     )
                     
                     if delimiter_choice == 'Custom':
@@ -185,17 +283,24 @@ def main():
                         "Single Quote (')": "'",
                         'None': ''
                     }
-                    quote_choice = st.selectbox("Quote Character", options=list(quote_options.keys()))
+                    quote_choice = st.selectbox(
+                        "Quote Character",
+                        options=list(quote_options.keys()),
+                        index=list(quote_options.values()).index(sniffed['quotechar'])
+                    )
                     quotechar = quote_options[quote_choice]
 
                     # Header option
-                    has_header = st.checkbox("File has header", value=True)
+                    has_header = st.checkbox("File has header", value=sniffed['has_header'])
 
                     # Preview data
                     st.subheader("Preview Data")
-                    df_preview = preview_csv(file_path, delimiter, quotechar, has_header)
+                    preview = get_csv_preview(
+                        file_path, os.path.getmtime(file_path), delimiter, quotechar, has_header, sample_size
+                    )
                     
-                    if df_preview is not None:
+                    if preview is not None:
+                        df_preview, detected_types = preview
                         st.dataframe(df_preview)
 
                         # Improved Column Type UI
@@ -205,18 +310,19 @@ def main():
                         auto_detect = st.checkbox("Auto-detect column types", value=True)
                         
                         if auto_detect:
-                            column_types = get_column_types(df_preview)
+                            # Types are detected again by the reader at import time
+                            column_types = None
                             
                             # Display auto-detected types in a table format
                             type_df = pd.DataFrame({
-                                'Column Name': column_types.keys(),
-                                'Detected Type': column_types.values()
+                                'Column Name': detected_types.keys(),
+                                'Detected Type': detected_types.values()
                             })
                             st.table(type_df)
                             
                         else:
                             # Manual column type selection with improved UI
-                            sql_types = ['INTEGER', 'DOUBLE', 'VARCHAR', 'BOOLEAN', 'TIMESTAMP', 'DATE']
+                            sql_types = ['BIGINT', 'INTEGER', 'DOUBLE', 'VARCHAR', 'BOOLEAN', 'DATE', 'TIME', 'TIMESTAMP']
                             column_types = {}
                             
                             # Create a container for the column type selection
@@ -232,7 +338,7 @@ def main():
                                     sample_str = ", ".join(str(x) for x in sample_values)
                                     
                                     # Auto-detect initial type
-                                    initial_type = get_column_types(df_preview)[col]
+                                    initial_type = detected_types.get(col, 'VARCHAR')
                                     
                                     type_data.append({
                                         "Column": col,
@@ -254,7 +360,7 @@ def main():
                                         column_types[row["Column"]] = st.selectbox(
                                             "Type",
                                             options=sql_types,
-                                            index=sql_types.index(row["Type"]) if row["Type"] in sql_types else 0,
+                                            index=sql_types.index(row["Type"]) if row["Type"] in sql_types else sql_types.index('VARCHAR'),
                                             key=f"type_{i}",
                                             label_visibility="collapsed"
                                         )
@@ -283,61 +389,62 @@ def main():
                                 
                                 with col4:
                                     if st.button("Reset to Auto-detected"):
-                                        column_types = get_column_types(df_preview)
+                                        column_types = dict(detected_types)
                                         st.rerun()
 
                         # Import to DuckDB with specified options
                         if st.button("Import CSV", type="primary"):
                             try:
-                                conn = duckdb.connect("flatfiles.db")
-                                
                                 # Create table name from file name
-                                table_name = Path(file_path).stem.lower().replace(" ", "_")
+                                table_name = csv_table_name(file_path)
                                 
                                 # Show selected configuration
                                 st.write("Configuration Summary:")
                                 config_df = pd.DataFrame({
-                                    'Setting': ['Table Name', 'Delimiter', 'Quote Character', 'Has Header'],
-                                    'Value': [table_name, delimiter, quotechar, has_header]
+                                    'Setting': ['Table Name', 'Delimiter', 'Quote Character', 'Has Header', 'Sample Rows'],
+                                    'Value': [table_name, delimiter, quotechar, has_header, 'all' if sample_size < 0 else sample_size]
                                 })
                                 st.dataframe(config_df)
                                 
                                 # Show column types
                                 st.write("Column Types:")
                                 types_df = pd.DataFrame({
-                                    'Column': column_types.keys(),
-                                    'Type': column_types.values()
+                                    'Column': (column_types or detected_types).keys(),
+                                    'Type': (column_types or detected_types).values()
                                 })
                                 st.dataframe(types_df)
                                 
-                                # Construct CREATE TABLE statement with column types
-                                columns_def = ", ".join([f'"{col}" {dtype}' for col, dtype in column_types.items()])
-                                create_table_sql = f"""
-                                CREATE TABLE IF NOT EXISTS {table_name} (
-                                    {columns_def}
+                                # Load with DuckDB's parallel reader; rows that don't parse are set aside
+                                import_progress = st.progress(0.0, "Starting import...")
+                                result = import_csv(
+                                    file_path, table_name, delimiter, quotechar, has_header,
+                                    sample_size=sample_size,
+                                    column_types=column_types,
+                                    progress_bar=import_progress
                                 )
-                                """
-                                conn.execute(create_table_sql)
-                                
-                                # Import data
-                                copy_sql = f"""
-                                COPY {table_name} FROM '{file_path}' 
-                                (DELIMITER '{delimiter}', 
-                                HEADER {str(has_header).lower()},
-                                QUOTE '{quotechar if quotechar else ""}')
-                                """
-                                conn.execute(copy_sql)
-                                conn.close()
                                 
                                 # Store DuckDB parameters
-                                st.session_state.connection_params = {"path": "flatfiles.db"}
-                                st.success(f"CSV file imported as table: {table_name}")
+                                st.session_state.connection_params = {"path": FLATFILES_DB}
+                                st.success(
+                                    f"CSV file imported as table: {table_name} "
+                                    f"({result['rows']:,} rows in {result['seconds']:,.1f}s, "
+                                    f"{result['rows_per_second']:,.0f} rows/s, {result['mb_per_second']:,.1f} MB/s)"
+                                )
+                                if result['rejected_rows']:
+                                    st.warning(
+                                        f"{result['rejected_rows']:,} rows could not be read and were stored "
+                                        f"in table {result['rejects_table']}"
+                                    )
+                                    st.dataframe(get_rejected_rows(result['rejects_table']), hide_index=True)
                                 
                             except Exception as e:
                                 st.error(f"Error importing CSV: {str(e)}")
                 elif file_path:
                     st.error("File not found. Please check the path and try again.")
 
+            elif st.session_state.selected_db == FILE_SOURCE_TYPE:
+                st.session_state.connection_params = show_file_source_editor()
+
             # Special handling for MSSQL to include driver selection
             elif st.session_state.selected_db.lower() == "mssql":
                 params = get_connection_params(st.session_state.selected_db)
@@ -382,7 +489,7 @@ def main():
             with col1:
                 if st.button("Test Connection", key="test_conn_create"):
                     if st.session_state.selected_db == "CSV":
-                        conn = create_connection("duckdb", {"path": "flatfiles.db"})
+                        conn = create_connection("duckdb", {"path": FLATFILES_DB})
                     else:
                         conn = create_connection(st.session_state.selected_db, st.session_state.connection_params)
                     if conn:
@@ -395,7 +502,7 @@ def main():
                         save_connection(
                             st.session_state.connection_name,
                             "duckdb",
-                            {"path": "flatfiles.db"}
+                            {"path": FLATFILES_DB}
                         )
                     else:
                         save_connection(
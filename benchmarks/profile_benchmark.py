@@ -0,0 +1,290 @@
+"""Reproducible profiling benchmarks over synthetic DuckDB and Parquet tables
+
+Run from the repository root:
+
+    python -m benchmarks.profile_benchmark --suite quick
+    python -m benchmarks.profile_benchmark --rows 1000000 --columns 200 --type-mix string --output results.jsonl
+
+Every case generates a deterministic table (values are hashes of the row and column
+number), profiles it with generate_profile and times the profile viewer accessors,
+all in a fresh subprocess and temporary working directory so peak memory is measured
+per case and profiles.db of the app is not touched. One JSON line per case is
+appended to the output file.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+import itertools
+import subprocess
+import importlib.util
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Row and column counts of the predefined suites
+SUITES = {
+    'quick': {'rows': [1_000, 100_000], 'columns': [5, 50]},
+    'standard': {'rows': [1_000, 1_000_000, 10_000_000], 'columns': [5, 200]},
+    'full': {'rows': [1_000, 1_000_000, 100_000_000], 'columns': [5, 200, 2000]}
+}
+
+# Column types generated for each type mix, assigned to columns round-robin
+TYPE_MIXES = {
+    'numeric': ['integer', 'double'],
+    'string': ['string'],
+    'temporal': ['date', 'timestamp'],
+    'mixed': ['integer', 'string', 'double', 'date', 'string', 'timestamp']
+}
+
+# Viewer accessors timed for each case, with the column kind they are called on
+ACCESSORS = [
+    ('get_table_profile', None),
+    ('get_column_metrics', 'any'),
+    ('get_column_histogram', 'any'),
+    ('get_value_frequencies', 'any'),
+    ('get_value_patterns', 'string')
+]
+
+def column_expression(index, column_type, null_rate, cardinality):
+    """SQL for one deterministic synthetic column over range(rows) aliased as i"""
+    value = f"hash(i, {index}) % {cardinality}"
+    expressions = {
+        'integer': f"CAST({value} AS BIGINT)",
+        'double': f"CAST({value} AS DOUBLE) / 7.0",
+        'string': f"'v' || CAST({value} AS VARCHAR)",
+        'date': f"DATE '2020-01-01' + CAST({value} AS INTEGER)",
+        'timestamp': f"TIMESTAMP '2020-01-01' + TO_SECONDS(CAST({value} AS BIGINT))"
+    }
+    null_threshold = int(null_rate * 10_000)
+    return (
+        f"CASE WHEN hash(i, {index}, 'null') % 10000 < {null_threshold} THEN NULL "
+        f"ELSE {expressions[column_type]} END AS c{index}_{column_type}"
+    )
+
+def create_source(case):
+    """Create the synthetic table as a DuckDB table or a view over a Parquet file; returns the database path"""
+    import duckdb
+
+    types = TYPE_MIXES[case['type_mix']]
+    select = ",\n".join(
+        column_expression(index, types[index % len(types)], case['null_rate'], case['cardinality'])
+        for index in range(case['columns'])
+    )
+    query = f"SELECT {select} FROM range({case['rows']}) AS r(i)"
+
+    database = duckdb.connect('source.duckdb')
+    try:
+        if case['source'] == 'parquet':
+            database.execute(f"COPY ({query}) TO 'source.parquet' (FORMAT PARQUET)")
+            database.execute("CREATE VIEW t AS SELECT * FROM read_parquet('source.parquet')")
+        else:
+            database.execute(f"CREATE TABLE t AS {query}")
+    finally:
+        database.close()
+    return 'source.duckdb'
+
+class TimedProgress:
+    """Progress bar stand-in recording when each progress message was reported"""
+
+    def __init__(self):
+        self.events = []
+
+    def progress(self, value, text=None):
+        self.events.append((time.perf_counter(), value, text))
+
+def load_viewer():
+    """Import the profile viewer page so its accessors can be timed outside Streamlit"""
+    spec = importlib.util.spec_from_file_location("profiling_viewer", REPO_ROOT / "pages" / "03_profiling.py")
+    viewer = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(viewer)
+    return viewer
+
+def time_accessors(summary_path):
+    """Time each viewer accessor cold (empty result cache) and warm"""
+    import pandas as pd
+    from profile_cache import clear_profile_cache
+
+    viewer = load_viewer()
+    summary = pd.read_parquet(summary_path)
+    first_of_kind = {kind: group['column_name'].iloc[0] for kind, group in summary.groupby('column_kind')}
+    first_of_kind['any'] = summary['column_name'].iloc[0]
+
+    timings = {}
+    for accessor, kind in ACCESSORS:
+        if kind is not None and kind not in first_of_kind:
+            continue
+        args = ('benchmark', 'main', 't') + ((first_of_kind[kind],) if kind else ())
+        function = getattr(viewer, accessor)
+
+        clear_profile_cache()
+        start = time.perf_counter()
+        function(*args)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        function(*args)
+        warm = time.perf_counter() - start
+        timings[accessor] = {'cold_seconds': round(cold, 4), 'warm_seconds': round(warm, 4)}
+    return timings
+
+def run_case(case):
+    """Run one benchmark case in a temporary working directory that is removed afterwards"""
+    sys.path.insert(0, str(REPO_ROOT))
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    workdir = tempfile.mkdtemp(prefix='profile_benchmark_')
+    os.chdir(workdir)
+    try:
+        return profile_case(case)
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def profile_case(case):
+    """Generate, profile and query one synthetic table"""
+    import ibis
+    from profiler import generate_profile
+    from profile_runs import peak_rss_mb, get_profile_runs
+
+    start = time.perf_counter()
+    database_path = create_source(case)
+    generate_seconds = time.perf_counter() - start
+
+    progress = TimedProgress()
+    connection = ibis.duckdb.connect(database_path)
+    start = time.perf_counter()
+    success, _ = generate_profile(
+        connection=connection,
+        schema='main',
+        table='t',
+        progress_bar=progress,
+        connection_name='benchmark',
+        **case['profile_options']
+    )
+    end = time.perf_counter()
+    connection.disconnect()
+
+    # The profile records each stage's measurements in profile_runs of this case's catalog
+    runs = get_profile_runs('benchmark', 'main', 't', limit=1)
+    stages = {
+        stage: {
+            'seconds': round(seconds, 4),
+            'rows': int(rows),
+            'bytes_written': int(bytes_written),
+            'peak_rss_mb': peak_rss
+        }
+        for stage, seconds, rows, bytes_written, peak_rss in runs[
+            ['stage', 'seconds', 'rows', 'bytes_written', 'peak_rss_mb']
+        ].itertuples(index=False)
+    }
+
+    result = {
+        'success': bool(success),
+        'generate_seconds': round(generate_seconds, 4),
+        'profile_seconds': round(end - start, 4),
+        'stage_seconds': {stage: measures['seconds'] for stage, measures in stages.items()},
+        'stages': stages,
+        'rows_per_second': round(case['rows'] / (end - start), 1) if end > start else None,
+        'progress': [
+            {'seconds': round(moment - start, 4), 'value': value, 'text': text}
+            for moment, value, text in progress.events
+        ]
+    }
+    if success:
+        result['accessors'] = time_accessors(Path('data_profiles/benchmark/main/t/summary.parquet'))
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+def git_commit():
+    """Commit of the code being benchmarked, if it is a git checkout"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+def build_cases(args):
+    """Expand the command line options into the list of benchmark cases"""
+    rows = args.rows or SUITES[args.suite]['rows']
+    columns = args.columns or SUITES[args.suite]['columns']
+    profile_options = {
+        'push_down': args.push_down,
+        'use_sketches': args.sketches
+    }
+    return [
+        {
+            'rows': row_count,
+            'columns': column_count,
+            'type_mix': type_mix,
+            'null_rate': null_rate,
+            'cardinality': cardinality,
+            'source': source,
+            'profile_options': profile_options
+        }
+        for row_count, column_count, type_mix, null_rate, cardinality, source in itertools.product(
+            rows, columns, args.type_mix, args.null_rate, args.cardinality, args.source
+        )
+    ]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark profiling over synthetic tables.")
+    parser.add_argument("--suite", choices=list(SUITES), default='quick',
+                        help="Predefined row and column counts, overridden by --rows and --columns")
+    parser.add_argument("--rows", type=int, nargs="+", help="Row counts to generate")
+    parser.add_argument("--columns", type=int, nargs="+", help="Column counts to generate")
+    parser.add_argument("--type-mix", nargs="+", choices=list(TYPE_MIXES), default=['mixed'],
+                        help="Column type mixes to generate")
+    parser.add_argument("--null-rate", type=float, nargs="+", default=[0.1],
+                        help="Fractions of null values per column")
+    parser.add_argument("--cardinality", type=int, nargs="+", default=[1000],
+                        help="Distinct values per column")
+    parser.add_argument("--source", nargs="+", choices=['duckdb', 'parquet'], default=['duckdb', 'parquet'],
+                        help="Store the table in DuckDB or read it from a Parquet file")
+    parser.add_argument("--push-down", action="store_true", help="Profile with push-down instead of exporting")
+    parser.add_argument("--sketches", action="store_true", help="Use HyperLogLog unique counts")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs of each case")
+    parser.add_argument("--output", default="benchmark_results.jsonl",
+                        help="JSON lines file the results are appended to")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    cases = build_cases(args)
+    run_info = {
+        'run_at': datetime.now().isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+    # A fresh process per case keeps peak memory and DuckDB state independent between cases
+    context = multiprocessing.get_context('spawn')
+    with open(args.output, 'a') as output:
+        for case, repeat in itertools.product(cases, range(args.repeat)):
+            label = (f"{case['rows']:,} rows x {case['columns']} {case['type_mix']} columns "
+                     f"from {case['source']} (run {repeat + 1})")
+            print(f"Running {label}...", flush=True)
+            with context.Pool(1) as pool:
+                try:
+                    result = pool.apply(run_case, (case,))
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+
+            output.write(json.dumps({**run_info, **case, 'repeat': repeat, **result}, default=str) + "\n")
+            output.flush()
+            if result.get('success'):
+                print(f"  profiled in {result['profile_seconds']}s, peak RSS {result['peak_rss_mb']} MB", flush=True)
+            else:
+                print(f"  failed: {result.get('error', 'the profile reported an error, see the log above')}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import os
+import time
+import logging
+import threading
+import duckdb
+import pandas as pd
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional, Tuple
+from duckdb_settings import connect_duckdb
+
+# DuckDB database holding the profile catalog
+CATALOG_DB = 'profiles.db'
+
+# Serializes catalog access of the threads of this process
+CATALOG_LOCK = threading.RLock()
+
+# Seconds to keep retrying while another process has the catalog file open
+CATALOG_LOCK_TIMEOUT_SECONDS = 120
+
+# First wait between retries, doubled after each attempt up to CATALOG_RETRY_MAX_SECONDS
+CATALOG_RETRY_SECONDS = 0.1
+CATALOG_RETRY_MAX_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
+
+# Catalog files whose table was created or migrated by this process
+_ready_catalogs = set()
+_index = None
+_index_version = None
+
+def ensure_catalog(catalog_db):
+    """Create the catalog table if needed and add columns introduced after it was created"""
+    catalog_db.execute("""
+        CREATE TABLE IF NOT EXISTS profile_catalog (
+            connection_name VARCHAR,
+            schema_name VARCHAR,
+            table_name VARCHAR,
+            data_path VARCHAR,
+            summary_path VARCHAR,
+            pattern_path VARCHAR,
+            last_profiled TIMESTAMP,
+            PRIMARY KEY (connection_name, schema_name, table_name)
+        )
+    """)
+    for column, column_type in [
+        ('row_count', 'BIGINT'),
+        ('watermark_column', 'VARCHAR'),
+        ('watermark_value', 'VARCHAR'),
+        ('histogram_path', 'VARCHAR'),
+        ('top_values_path', 'VARCHAR')
+    ]:
+        catalog_db.execute(f"ALTER TABLE profile_catalog ADD COLUMN IF NOT EXISTS {column} {column_type}")
+
+def open_catalog(timeout: float = CATALOG_LOCK_TIMEOUT_SECONDS):
+    """Open the catalog database, waiting while another process holds its file lock"""
+    deadline = time.monotonic() + timeout
+    delay = CATALOG_RETRY_SECONDS
+    while True:
+        try:
+            return connect_duckdb(CATALOG_DB)
+        except duckdb.IOException as e:
+            if 'lock' not in str(e).lower() or time.monotonic() + delay > deadline:
+                raise
+            logger.info(f"{CATALOG_DB} is locked by another process, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, CATALOG_RETRY_MAX_SECONDS)
+
+@contextmanager
+def catalog_connection():
+    """Connection to the catalog database for one read or write, closed afterwards
+
+    DuckDB lets only one process at a time open the file for writing, so the app
+    never holds it between operations and the command line profiler can write to
+    it while the app is running. A file locked by another process is retried for
+    up to CATALOG_LOCK_TIMEOUT_SECONDS.
+    """
+    with CATALOG_LOCK:
+        catalog_db = open_catalog()
+        try:
+            # CATALOG_DB is relative, so another working directory means another catalog
+            catalog_path = os.path.abspath(CATALOG_DB)
+            if catalog_path not in _ready_catalogs:
+                ensure_catalog(catalog_db)
+                _ready_catalogs.add(catalog_path)
+            yield catalog_db
+        finally:
+            catalog_db.close()
+
+def catalog_version():
+    """Modification times of the catalog files, used to notice writes from other processes"""
+    return tuple(
+        os.path.getmtime(path) if os.path.exists(path) else None
+        for path in (CATALOG_DB, f"{CATALOG_DB}.wal")
+    )
+
+def invalidate_catalog():
+    """Drop the in-memory catalog index so the next lookup reloads it"""
+    global _index
+    with CATALOG_LOCK:
+        _index = None
+
+def catalog_index() -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+    """All catalog entries keyed by (connection_name, schema_name, table_name)
+
+    The index is loaded with a single query and kept until this process writes to
+    the catalog or the catalog files are modified by another process.
+    """
+    global _index, _index_version
+    with CATALOG_LOCK:
+        version = catalog_version()
+        if _index is None or version != _index_version:
+            with catalog_connection() as catalog_db:
+                entries = catalog_db.execute("SELECT * FROM profile_catalog").df()
+            _index = {
+                (row['connection_name'], row['schema_name'], row['table_name']): {
+                    key: (None if pd.isna(value) else value) for key, value in row.items()
+                }
+                for row in entries.to_dict('records')
+            }
+            _index_version = version
+        return _index
+
+def catalog_entries() -> pd.DataFrame:
+    """Every catalog entry as a DataFrame, one row per profiled table"""
+    return pd.DataFrame(list(catalog_index().values()))
+
+def get_catalog_entry(connection_name, schema, table) -> Optional[Dict[str, Any]]:
+    """Fetch the catalog entry of a previously profiled table as a dict, or None"""
+    entry = catalog_index().get((connection_name, schema, table))
+    return dict(entry) if entry is not None else None
+
+def update_catalog(connection_name, schema, table, data_path, summary_path, pattern_path,
+                   row_count=None, watermark_column=None, watermark_value=None, histogram_path=None,
+                   top_values_path=None):
+    """Replace the catalog entry for a profiled table"""
+    with catalog_connection() as catalog_db:
+        catalog_db.begin()
+        try:
+            # Delete existing entry if it exists
+            catalog_db.execute("""
+                DELETE FROM profile_catalog
+                WHERE connection_name = ?
+                AND schema_name = ?
+                AND table_name = ?
+            """, [connection_name, schema, table])
+
+            # Insert new entry
+            catalog_db.execute("""
+                INSERT INTO profile_catalog
+                (connection_name, schema_name, table_name, data_path, summary_path, pattern_path, last_profiled,
+                 row_count, watermark_column, watermark_value, histogram_path, top_values_path)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                connection_name,
+                schema,
+                table,
+                data_path,
+                summary_path,
+                pattern_path,
+                datetime.now(),
+                row_count,
+                watermark_column,
+                watermark_value,
+                histogram_path,
+                top_values_path
+            ])
+
+            catalog_db.commit()
+        except Exception:
+            catalog_db.rollback()
+            raise
+        finally:
+            invalidate_catalog()
+
+def delete_catalog_entries(keys: Iterable[Tuple[str, str, str]]) -> None:
+    """Remove catalog entries given as (connection_name, schema_name, table_name) tuples"""
+    with catalog_connection() as catalog_db:
+        try:
+            for connection_name, schema, table in keys:
+                catalog_db.execute("""
+                    DELETE FROM profile_catalog
+                    WHERE connection_name = ?
+                    AND schema_name = ?
+                    AND table_name = ?
+                """, [connection_name, schema, table])
+        finally:
+            invalidate_catalog()
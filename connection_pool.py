@@ -0,0 +1,119 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+# Pooled connections unused for this long are disconnected
+POOL_IDLE_SECONDS = 15 * 60
+
+# Connections used within this many seconds are assumed alive without a liveness query
+HEALTH_CHECK_SECONDS = 30
+
+_pool = {}
+_pool_lock = threading.Lock()
+
+def _config_key(db_type: str, params: Dict[str, Any]) -> str:
+    """Identify a connection's settings, so an edited saved connection gets a fresh backend"""
+    return json.dumps({'type': db_type, 'params': params}, sort_keys=True, default=str)
+
+def _disconnect(backend) -> None:
+    """Close a backend, ignoring backends that are already gone"""
+    disconnect = getattr(backend, 'disconnect', None)
+    if disconnect:
+        try:
+            disconnect()
+        except Exception:
+            pass
+
+def _in_use(entry) -> bool:
+    """Whether another thread is holding a pooled connection for its queries"""
+    if not entry['lock'].acquire(blocking=False):
+        return True
+    entry['lock'].release()
+    return False
+
+def is_alive(backend) -> bool:
+    """Cheap liveness check: run a constant query on the backend"""
+    try:
+        backend.sql('SELECT 1 AS alive').execute()
+        return True
+    except Exception:
+        return False
+
+def evict_idle_connections(max_idle: float = POOL_IDLE_SECONDS) -> None:
+    """Disconnect pooled connections that have not been used for max_idle seconds"""
+    now = time.monotonic()
+    with _pool_lock:
+        idle = [
+            name for name, entry in _pool.items()
+            if now - entry['last_used'] > max_idle and not _in_use(entry)
+        ]
+        for name in idle:
+            _disconnect(_pool.pop(name)['backend'])
+
+def evict_connection(name: str) -> None:
+    """Disconnect and forget the pooled connection of a saved connection"""
+    with _pool_lock:
+        entry = _pool.pop(name, None)
+    if entry is not None and not _in_use(entry):
+        _disconnect(entry['backend'])
+
+def get_pooled_connection(name: str, db_type: str, params: Dict[str, Any],
+                          connect: Callable[[str, Dict[str, Any]], Optional[Any]]):
+    """Return the pooled backend of a saved connection, connecting with connect() when needed
+
+    Backends are shared across reruns and sessions of the app, so queries on them
+    run inside hold_pooled_connection. A backend idle for longer than
+    HEALTH_CHECK_SECONDS is checked with a constant query and replaced if it no
+    longer responds.
+    """
+    evict_idle_connections()
+    config_key = _config_key(db_type, params)
+
+    with _pool_lock:
+        entry = _pool.get(name)
+        if entry is not None and entry['config_key'] != config_key:
+            # A backend still in use is left to its holder and closed when it is collected
+            _pool.pop(name)
+            if not _in_use(entry):
+                _disconnect(entry['backend'])
+            entry = None
+
+        if entry is not None:
+            now = time.monotonic()
+            if (now - entry['last_used'] <= HEALTH_CHECK_SECONDS or _in_use(entry)
+                    or is_alive(entry['backend'])):
+                entry['last_used'] = now
+                return entry['backend']
+            _disconnect(_pool.pop(name)['backend'])
+
+        backend = connect(db_type, params)
+        if backend is not None:
+            _pool[name] = {
+                'backend': backend,
+                'config_key': config_key,
+                'last_used': time.monotonic(),
+                'lock': threading.RLock()
+            }
+        return backend
+
+@contextmanager
+def hold_pooled_connection(name: str):
+    """Use the pooled backend of a saved connection from one thread at a time
+
+    A backend is one database session, so metadata queries from several sessions of
+    the app would otherwise run on it at once. Hold it only for short queries; long
+    work such as profiling opens its own connection. The backend is neither
+    health-checked nor evicted while it is held.
+    """
+    with _pool_lock:
+        entry = _pool.get(name)
+    if entry is None:
+        yield
+        return
+    with entry['lock']:
+        try:
+            yield
+        finally:
+            entry['last_used'] = time.monotonic()
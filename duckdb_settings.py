@@ -0,0 +1,61 @@
+import os
+import uuid
+import zlib
+import duckdb
+import ibis
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Memory each DuckDB connection may use before spilling to disk, e.g. '4GB'; None uses
+# DuckDB's default of 80% of system memory. Concurrent profiles each get this much.
+DUCKDB_MEMORY_LIMIT = os.environ.get('PROFILER_DUCKDB_MEMORY_LIMIT')
+
+# Worker threads per DuckDB connection; None uses one per CPU core
+DUCKDB_THREADS = os.environ.get('PROFILER_DUCKDB_THREADS')
+
+# Folder large aggregations and sorts spill to; every connection gets its own subfolder
+DUCKDB_TEMP_DIRECTORY = os.environ.get('PROFILER_DUCKDB_TEMP_DIRECTORY', 'duckdb_temp')
+
+# Keeping insertion order makes DuckDB buffer results; profiling never relies on row order
+DUCKDB_PRESERVE_INSERTION_ORDER = os.environ.get('PROFILER_DUCKDB_PRESERVE_INSERTION_ORDER', 'false')
+
+def configure_duckdb(memory_limit: Optional[str] = None, threads: Optional[int] = None,
+                     temp_directory: Optional[str] = None,
+                     preserve_insertion_order: Optional[bool] = None) -> None:
+    """Override the engine settings of connections opened from now on; None keeps a setting"""
+    global DUCKDB_MEMORY_LIMIT, DUCKDB_THREADS, DUCKDB_TEMP_DIRECTORY, DUCKDB_PRESERVE_INSERTION_ORDER
+    if memory_limit is not None:
+        DUCKDB_MEMORY_LIMIT = memory_limit
+    if threads is not None:
+        DUCKDB_THREADS = threads
+    if temp_directory is not None:
+        DUCKDB_TEMP_DIRECTORY = temp_directory
+    if preserve_insertion_order is not None:
+        DUCKDB_PRESERVE_INSERTION_ORDER = preserve_insertion_order
+
+def duckdb_config(database: str = ':memory:') -> Dict[str, str]:
+    """DuckDB configuration options for a new connection to database"""
+    config = {'preserve_insertion_order': str(DUCKDB_PRESERVE_INSERTION_ORDER).lower()}
+    if DUCKDB_MEMORY_LIMIT:
+        config['memory_limit'] = str(DUCKDB_MEMORY_LIMIT)
+    if DUCKDB_THREADS:
+        config['threads'] = str(DUCKDB_THREADS)
+    if DUCKDB_TEMP_DIRECTORY:
+        # DuckDB names its spill files the same way in every database, so databases
+        # sharing one folder would overwrite each other's. DuckDB creates the subfolder
+        # on the first spill and removes it when the database closes. Connections to the
+        # same file must have the same configuration, so files get a stable subfolder.
+        if database == ':memory:':
+            database_key = uuid.uuid4().hex
+        else:
+            database_key = f"{zlib.crc32(str(Path(database).resolve()).encode()):08x}"
+        config['temp_directory'] = str(Path(DUCKDB_TEMP_DIRECTORY) / f"{os.getpid()}-{database_key}")
+    return config
+
+def connect_duckdb(database: str = ':memory:', read_only: bool = False) -> duckdb.DuckDBPyConnection:
+    """Open a DuckDB connection with the shared engine settings"""
+    return duckdb.connect(database, read_only=read_only, config=duckdb_config(database))
+
+def connect_ibis_duckdb(database: str = ':memory:', **config: Any) -> ibis.BaseBackend:
+    """Open an Ibis DuckDB backend with the shared engine settings; config overrides them"""
+    return ibis.duckdb.connect(database, **{**duckdb_config(database), **config})
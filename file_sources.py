@@ -0,0 +1,74 @@
+import glob
+import os
+import re
+import itertools
+import ibis
+from pathlib import Path
+from typing import Dict, List
+from duckdb_settings import connect_ibis_duckdb
+from flatfile_import import sql_string, quote_identifier
+
+# Connection type whose tables are views over files, profiled in place without importing them
+FILE_SOURCE_TYPE = 'File source'
+
+# DuckDB reader of each file extension; compressed files are read by the reader of their inner extension
+FILE_READERS = {
+    '.parquet': 'read_parquet',
+    '.csv': 'read_csv',
+    '.tsv': 'read_csv',
+    '.txt': 'read_csv',
+    '.json': 'read_json_auto',
+    '.jsonl': 'read_json_auto',
+    '.ndjson': 'read_json_auto'
+}
+
+COMPRESSION_EXTENSIONS = {'.gz', '.zst'}
+
+def is_file_source(db_type: str) -> bool:
+    """Whether a saved connection type is a file source"""
+    return db_type.lower() == FILE_SOURCE_TYPE.lower()
+
+def file_reader(pattern: str) -> str:
+    """DuckDB reader function for a file path or glob, chosen by its extension"""
+    suffixes = [suffix.lower() for suffix in Path(pattern).suffixes if suffix.lower() not in COMPRESSION_EXTENSIONS]
+    if not suffixes or suffixes[-1] not in FILE_READERS:
+        raise ValueError(f"Unsupported file type: {pattern}. Supported: {', '.join(sorted(FILE_READERS))}")
+    return FILE_READERS[suffixes[-1]]
+
+def source_view_name(pattern: str) -> str:
+    """Default view name of a file or glob: its file name, or the folder above its wildcards"""
+    path = Path(pattern)
+    name = path.name.split('.')[0]
+    if glob.has_magic(pattern):
+        fixed_parts = list(itertools.takewhile(lambda part: not glob.has_magic(part), path.parts))
+        name = fixed_parts[-1] if fixed_parts else ''
+    name = re.sub(r'\W+', '_', name).strip('_').lower()
+    return name or 'file_source'
+
+def matching_files(pattern: str) -> List[str]:
+    """Files a path or glob currently matches"""
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+def view_sql(name: str, pattern: str) -> str:
+    """CREATE VIEW statement reading a file or glob in place
+
+    Files of a glob with differing columns are unioned by column name, and
+    key=value folders are read as hive partition columns. Queries on the view are
+    planned against the files, so only the columns and row groups they need are read.
+    """
+    reader = file_reader(pattern)
+    options = "union_by_name = true"
+    if any('=' in folder for path in matching_files(pattern) for folder in Path(path).parent.parts):
+        options += ", hive_partitioning = true"
+    return f"CREATE OR REPLACE VIEW {quote_identifier(name)} AS SELECT * FROM {reader}({sql_string(pattern)}, {options})"
+
+def connect_file_source(sources: Dict[str, str]) -> ibis.BaseBackend:
+    """In-memory DuckDB backend with one view per file or glob in sources (view name -> path)"""
+    backend = connect_ibis_duckdb()
+    try:
+        for name, pattern in sources.items():
+            backend.raw_sql(view_sql(name, pattern))
+    except Exception:
+        backend.disconnect()
+        raise
+    return backend
@@ -0,0 +1,461 @@
+import os
+import re
+import glob
+import time
+import hashlib
+import threading
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Union
+from duckdb_settings import connect_duckdb
+
+# DuckDB database flat files are imported into
+FLATFILES_DB = 'flatfiles.db'
+
+# Rows the CSV sniffer reads to detect the dialect and column types; -1 reads the whole file
+CSV_SAMPLE_SIZE = 100_000
+
+# Seconds between progress reports while a CSV file is imported
+IMPORT_PROGRESS_SECONDS = 0.5
+
+# Files fingerprinted or sniffed, and groups of files imported, at the same time in bulk imports
+IMPORT_WORKERS = 4
+
+# Bytes read at a time when hashing file contents
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# Rows skipped by store_rejects; reject_errors has one row per bad value, so a row
+# with several bad columns appears there several times
+REJECTED_ROWS_SQL = "SELECT count(*) FROM (SELECT DISTINCT scan_id, file_id, line FROM reject_errors)"
+
+def sql_string(value: Any) -> str:
+    """Quote a value as a SQL string literal"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def quote_identifier(name: str) -> str:
+    """Quote a table or column name for DuckDB"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def csv_table_name(file_path: str) -> str:
+    """Table name a CSV file is imported as"""
+    return Path(file_path).stem.lower().replace(" ", "_")
+
+def partition_table_name(file_path: str) -> str:
+    """Table name shared by the partitions of a dataset, e.g. orders for orders_2026-10-01.csv
+
+    Dates and part numbers at either end of the file name are dropped; files named
+    only by such numbers take the name of their folder.
+    """
+    path = Path(file_path)
+    for name in (path.stem, path.parent.name):
+        name = re.sub(r'^[\d_\-.\s]+|[\d_\-.\s]+$', '', name)
+        if name:
+            return name.lower().replace(" ", "_")
+    return "csv_import"
+
+def read_csv_sql(file_path: Union[str, List[str]], delimiter: Optional[str] = None, quotechar: Optional[str] = None,
+                 has_header: Optional[bool] = None, sample_size: int = CSV_SAMPLE_SIZE,
+                 column_types: Optional[Dict[str, str]] = None, store_rejects: bool = False) -> str:
+    """read_csv() call for a file or list of files; options left as None are detected by the sniffer
+
+    With column_types the given columns are read with those types instead of the
+    sniffed ones. With store_rejects rows that do not parse are skipped and
+    recorded in the reject_errors temporary table instead of failing the read.
+    """
+    options = [f"sample_size = {int(sample_size)}"]
+    if delimiter is not None:
+        options.append(f"delim = {sql_string(delimiter)}")
+    if quotechar is not None:
+        options.append(f"quote = {sql_string(quotechar)}")
+    if has_header is not None:
+        options.append(f"header = {str(has_header).lower()}")
+    if column_types:
+        types = ", ".join(f"{sql_string(col)}: {sql_string(dtype)}" for col, dtype in column_types.items())
+        options.append(f"types = {{{types}}}")
+    if store_rejects:
+        options.append("store_rejects = true")
+    if isinstance(file_path, str):
+        files = sql_string(file_path)
+    else:
+        files = "[" + ", ".join(sql_string(path) for path in file_path) + "]"
+    return f"read_csv({files}, {', '.join(options)})"
+
+def sniff_csv(file_path: str, sample_size: int = CSV_SAMPLE_SIZE) -> Dict[str, Any]:
+    """Detect the delimiter, quote character, header and column types of a CSV file"""
+    conn = connect_duckdb()
+    try:
+        result = conn.execute(
+            f"SELECT * FROM sniff_csv({sql_string(file_path)}, sample_size = {int(sample_size)})"
+        )
+        names = [column[0] for column in result.description]
+        sniffed = dict(zip(names, result.fetchone()))
+    finally:
+        conn.close()
+
+    quotechar = sniffed.get('Quote')
+    return {
+        'delimiter': sniffed.get('Delimiter') or ',',
+        # The sniffer reports a NUL character when the file has no quoting
+        'quotechar': quotechar if quotechar in ('"', "'") else '',
+        'has_header': bool(sniffed.get('HasHeader', True)),
+        'column_types': {column['name']: column['type'] for column in sniffed.get('Columns') or []}
+    }
+
+def preview_csv(file_path: str, delimiter: str, quotechar: str, has_header: bool,
+                sample_size: int = CSV_SAMPLE_SIZE, rows: int = 5):
+    """First rows of a CSV file and its detected column types as read with the given dialect"""
+    conn = connect_duckdb()
+    try:
+        source = read_csv_sql(file_path, delimiter, quotechar, has_header, sample_size)
+        preview = conn.execute(f"SELECT * FROM {source} LIMIT {int(rows)}").df()
+        described = conn.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()
+    finally:
+        conn.close()
+    return preview, {name: column_type for name, column_type, *_ in described}
+
+def import_csv(file_path: str, table_name: str, delimiter: str, quotechar: str, has_header: bool,
+               sample_size: int = CSV_SAMPLE_SIZE, column_types: Optional[Dict[str, str]] = None,
+               progress_bar=None, database: str = FLATFILES_DB) -> Dict[str, Any]:
+    """Import a CSV file into a table with DuckDB's parallel CSV reader
+
+    The table is replaced if it exists. Rows that do not match the column types are
+    skipped and kept in a <table>_rejects table, with the line number and error of
+    each. progress_bar only needs a progress(value, text) method. Returns the
+    imported and rejected row counts with the elapsed time and throughput.
+    """
+    rejects_table = f"{table_name}_rejects"
+    file_size = os.path.getsize(file_path)
+    source = read_csv_sql(file_path, delimiter, quotechar, has_header, sample_size, column_types, store_rejects=True)
+
+    conn = connect_duckdb(database)
+    try:
+        start = time.perf_counter()
+        errors = []
+        def load():
+            try:
+                conn.execute(f"CREATE OR REPLACE TABLE {quote_identifier(table_name)} AS SELECT * FROM {source}")
+            except Exception as e:
+                errors.append(e)
+
+        # Load on a separate thread so this one can poll the query's progress
+        loader = threading.Thread(target=load, daemon=True)
+        loader.start()
+        while loader.is_alive():
+            loader.join(IMPORT_PROGRESS_SECONDS)
+            if progress_bar is not None and loader.is_alive():
+                query_progress = getattr(conn, 'query_progress', None)
+                percent = query_progress() if query_progress else -1
+                elapsed = time.perf_counter() - start
+                if percent >= 0:
+                    read_mb = file_size * percent / 100 / 1_000_000
+                    progress_bar.progress(
+                        min(percent / 100, 0.99),
+                        f"Imported {percent:.0f}% ({read_mb:,.0f} MB at {read_mb / elapsed:,.1f} MB/s)"
+                    )
+                else:
+                    progress_bar.progress(0.0, f"Importing... {elapsed:,.0f}s elapsed")
+        if errors:
+            raise errors[0]
+        seconds = time.perf_counter() - start
+
+        row_count = conn.execute(f"SELECT count(*) FROM {quote_identifier(table_name)}").fetchone()[0]
+        rejected = conn.execute(REJECTED_ROWS_SQL).fetchone()[0]
+        # reject_errors is temporary; keep this import's rejects next to the table
+        conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(rejects_table)}")
+        if rejected:
+            conn.execute(f"""
+                CREATE TABLE {quote_identifier(rejects_table)} AS
+                SELECT line, column_name, error_type, error_message, csv_line
+                FROM reject_errors
+                ORDER BY line
+            """)
+    finally:
+        conn.close()
+
+    result = {
+        'table_name': table_name,
+        'rows': int(row_count),
+        'rejected_rows': int(rejected),
+        'rejects_table': rejects_table if rejected else None,
+        'seconds': seconds,
+        'rows_per_second': row_count / seconds if seconds else None,
+        'mb_per_second': file_size / 1_000_000 / seconds if seconds else None
+    }
+    if progress_bar is not None:
+        progress_bar.progress(
+            1.0,
+            f"Imported {result['rows']:,} rows in {seconds:,.1f}s "
+            f"({result['rows_per_second']:,.0f} rows/s, {result['mb_per_second']:,.1f} MB/s)"
+        )
+    return result
+
+def get_rejected_rows(rejects_table: str, limit: int = 100, database: str = FLATFILES_DB) -> pd.DataFrame:
+    """First rows of a rejects table written by import_csv"""
+    conn = connect_duckdb(database)
+    try:
+        return conn.execute(f"SELECT * FROM {quote_identifier(rejects_table)} LIMIT {int(limit)}").df()
+    finally:
+        conn.close()
+
+def find_flat_files(pattern: str) -> List[str]:
+    """CSV files in a directory and its subfolders, or files matching a glob such as /drops/*/**/*.csv"""
+    if os.path.isdir(pattern):
+        return sorted(str(path) for path in Path(pattern).rglob("*.csv") if path.is_file())
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+def content_hash(file_path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def ensure_imported_files_table(conn) -> None:
+    """Create the table recording which files were imported into which table"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS imported_files (
+            file_path VARCHAR PRIMARY KEY,
+            file_size BIGINT,
+            modified_at DOUBLE,
+            content_hash VARCHAR,
+            table_name VARCHAR,
+            imported_at TIMESTAMP
+        )
+    """)
+
+def find_new_files(files: List[str], workers: int = IMPORT_WORKERS,
+                   database: str = FLATFILES_DB) -> Dict[str, List]:
+    """Split files into new ones (with their fingerprints) and ones imported before
+
+    A file whose path, size and modification time match an earlier import is skipped
+    without reading it. Other files are hashed and skipped if a file with the same
+    contents was imported already, e.g. the same drop delivered again; their
+    fingerprints are returned as duplicates so they can be recorded.
+    """
+    conn = connect_duckdb(database)
+    try:
+        ensure_imported_files_table(conn)
+        imported = conn.execute("SELECT file_path, file_size, modified_at, content_hash FROM imported_files").fetchall()
+    finally:
+        conn.close()
+    known_stats = {path: (size, modified) for path, size, modified, _ in imported}
+    known_hashes = {file_hash for *_, file_hash in imported}
+
+    new_files, skipped, duplicates = [], [], []
+    to_hash = []
+    for path in files:
+        stat = os.stat(path)
+        fingerprint = {'file_path': path, 'file_size': stat.st_size, 'modified_at': stat.st_mtime}
+        if known_stats.get(path) == (stat.st_size, stat.st_mtime):
+            skipped.append(path)
+        else:
+            to_hash.append(fingerprint)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        hashes = executor.map(lambda fingerprint: content_hash(fingerprint['file_path']), to_hash)
+        for fingerprint, file_hash in zip(to_hash, hashes):
+            if file_hash in known_hashes:
+                skipped.append(fingerprint['file_path'])
+                duplicates.append({**fingerprint, 'content_hash': file_hash})
+            else:
+                # Identical files within one drop are imported once
+                known_hashes.add(file_hash)
+                new_files.append({**fingerprint, 'content_hash': file_hash})
+    return {'new': new_files, 'skipped': skipped, 'duplicates': duplicates}
+
+def record_duplicate_files(files: List[Dict[str, Any]], database: str = FLATFILES_DB) -> None:
+    """Record files skipped as copies of imported files, so later runs skip them without hashing
+
+    Each copy is logged against the table of the file it duplicates. Copies of a
+    file whose import failed are left out, so that file is not skipped next time.
+    """
+    if not files:
+        return
+    conn = connect_duckdb(database)
+    try:
+        ensure_imported_files_table(conn)
+        imported_at = datetime.now()
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO imported_files
+            SELECT ?, ?, ?, content_hash, table_name, ?
+            FROM imported_files
+            WHERE content_hash = ? AND file_path <> ?
+            LIMIT 1
+            """,
+            [
+                [file['file_path'], file['file_size'], file['modified_at'], imported_at,
+                 file['content_hash'], file['file_path']]
+                for file in files
+            ]
+        )
+    finally:
+        conn.close()
+
+def group_column_types(formats: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Column types of a group of files: the type most files were sniffed with, VARCHAR without a majority"""
+    column_types = {}
+    for column in formats[0]['column_types']:
+        column_type, files = Counter(sniffed['column_types'][column] for sniffed in formats).most_common(1)[0]
+        column_types[column] = column_type if files * 2 > len(formats) else 'VARCHAR'
+    return column_types
+
+def group_by_schema(files: List[Dict[str, Any]], sample_size: int = CSV_SAMPLE_SIZE,
+                    workers: int = IMPORT_WORKERS) -> List[Dict[str, Any]]:
+    """Group files whose sniffed dialect and column names match, each with a table name
+
+    Types are not part of the key, since one malformed value makes the sniffer read
+    a whole file as VARCHAR. Each group is read with the types most of its files
+    were sniffed with, and rows that do not fit them are rejected.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        formats = list(executor.map(lambda file: sniff_csv(file['file_path'], sample_size), files))
+
+    groups = {}
+    for file, sniffed in zip(files, formats):
+        key = (
+            sniffed['delimiter'], sniffed['quotechar'], sniffed['has_header'],
+            tuple(sniffed['column_types'])
+        )
+        group = groups.setdefault(key, {'formats': [], 'files': []})
+        group['formats'].append(sniffed)
+        group['files'].append(file)
+
+    for group in groups.values():
+        group['format'] = {**group['formats'][0], 'column_types': group_column_types(group.pop('formats'))}
+
+    # Name each group after the dataset most of its files belong to, keeping names unique
+    used_names = Counter()
+    named_groups = []
+    for group in sorted(groups.values(), key=lambda group: -len(group['files'])):
+        name = Counter(partition_table_name(file['file_path']) for file in group['files']).most_common(1)[0][0]
+        used_names[name] += 1
+        group['table_name'] = name if used_names[name] == 1 else f"{name}_{used_names[name]}"
+        named_groups.append(group)
+    return named_groups
+
+def import_file_group(group: Dict[str, Any], sample_size: int = CSV_SAMPLE_SIZE,
+                      database: str = FLATFILES_DB) -> Dict[str, Any]:
+    """Append a group of same-schema CSV files to their table with one read_csv over all of them
+
+    The table is created on first import and later drops are appended to it, read
+    with the table's column types. The rows, rejected rows and file records are
+    written in one transaction, so a failed group can simply be imported again.
+    """
+    table_name = group['table_name']
+    rejects_table = f"{table_name}_rejects"
+    sniffed = group['format']
+    paths = [file['file_path'] for file in group['files']]
+    table = quote_identifier(table_name)
+
+    conn = connect_duckdb(database)
+    try:
+        ensure_imported_files_table(conn)
+        start = time.perf_counter()
+        # Closing the connection rolls back the transaction of a group that failed
+        conn.execute("BEGIN TRANSACTION")
+        table_types = dict(conn.execute(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_schema = 'main' AND table_name = ?",
+            [table_name]
+        ).fetchall())
+        table_exists = bool(table_types)
+        # Values that don't fit the existing table are rejected instead of failing the insert
+        column_types = {
+            column: table_types.get(column, column_type) for column, column_type in sniffed['column_types'].items()
+        }
+        source = read_csv_sql(
+            paths, sniffed['delimiter'], sniffed['quotechar'], sniffed['has_header'], sample_size,
+            column_types, store_rejects=True
+        )
+        before = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0] if table_exists else 0
+        if table_exists:
+            conn.execute(f"INSERT INTO {table} BY NAME SELECT * FROM {source}")
+        else:
+            conn.execute(f"CREATE TABLE {table} AS SELECT * FROM {source}")
+        rows = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0] - before
+
+        rejected = conn.execute(REJECTED_ROWS_SQL).fetchone()[0]
+        if rejected:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {quote_identifier(rejects_table)} AS
+                SELECT s.file_path, e.line, e.column_name, e.error_type, e.error_message, e.csv_line
+                FROM reject_errors e JOIN reject_scans s USING (scan_id, file_id)
+                LIMIT 0
+            """)
+            conn.execute(f"""
+                INSERT INTO {quote_identifier(rejects_table)}
+                SELECT s.file_path, e.line, e.column_name, e.error_type, e.error_message, e.csv_line
+                FROM reject_errors e JOIN reject_scans s USING (scan_id, file_id)
+                ORDER BY s.file_path, e.line
+            """)
+
+        imported_at = datetime.now()
+        conn.executemany(
+            "INSERT OR REPLACE INTO imported_files VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                [file['file_path'], file['file_size'], file['modified_at'], file['content_hash'], table_name, imported_at]
+                for file in group['files']
+            ]
+        )
+        conn.execute("COMMIT")
+        seconds = time.perf_counter() - start
+    finally:
+        conn.close()
+
+    total_bytes = sum(file['file_size'] for file in group['files'])
+    return {
+        'table_name': table_name,
+        'files': len(paths),
+        'rows': int(rows),
+        'rejected_rows': int(rejected),
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else None,
+        'mb_per_second': total_bytes / 1_000_000 / seconds if seconds else None
+    }
+
+def import_csv_files(pattern: str, sample_size: int = CSV_SAMPLE_SIZE, workers: int = IMPORT_WORKERS,
+                     progress_bar=None, database: str = FLATFILES_DB) -> Dict[str, Any]:
+    """Import every new CSV file in a directory or glob
+
+    Files imported before are skipped, the rest are grouped by schema and each
+    group is appended to its own table, with groups imported in parallel. Copies of
+    imported files are recorded once their originals are in. Returns the skipped
+    files and one result per group; a failed group has an 'error'.
+    """
+    files = find_flat_files(pattern)
+    if progress_bar is not None:
+        progress_bar.progress(0.0, f"Checking {len(files):,} file(s) for earlier imports...")
+    found = find_new_files(files, workers, database)
+
+    if progress_bar is not None:
+        progress_bar.progress(0.1, f"Detecting the format of {len(found['new']):,} new file(s)...")
+    groups = group_by_schema(found['new'], sample_size, workers) if found['new'] else []
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(import_file_group, group, sample_size, database): group for group in groups}
+        for future in as_completed(futures):
+            group = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({'table_name': group['table_name'], 'files': len(group['files']), 'error': str(e)})
+            if progress_bar is not None:
+                progress_bar.progress(
+                    0.1 + 0.9 * len(results) / len(groups),
+                    f"Imported {len(results)} of {len(groups)} table(s)..."
+                )
+    record_duplicate_files(found['duplicates'], database)
+
+    if progress_bar is not None:
+        progress_bar.progress(
+            1.0,
+            f"Imported {len(found['new']) - sum(result['files'] for result in results if 'error' in result):,} "
+            f"file(s) into {len(groups)} table(s), skipped {len(found['skipped']):,} imported before"
+        )
+    return {'files': len(files), 'skipped': found['skipped'], 'groups': results}
@@ -0,0 +1,163 @@
+import math
+import ibis
+import ibis.selectors as s
+import pandas as pd
+from typing import List
+
+# Default number of bins in numeric histograms
+HISTOGRAM_BINS = 10
+
+# Supported ways of placing numeric bin edges
+BINNING_METHODS = ['equal_width', 'quantile', 'log']
+
+HISTOGRAM_COLUMNS = ['column_name', 'bin_num', 'bin_start', 'bin_end', 'count', 'label']
+
+# Bin numbers of values outside the regular bins: values <= 0 in log histograms and NaN/infinity
+NON_POSITIVE_BIN = -1
+NON_FINITE_BIN = -2
+
+def bin_label(bin_start, bin_end, is_integer):
+    """Axis label of a numeric bin; integer bins show the whole numbers they contain"""
+    if is_integer:
+        start, end = int(math.ceil(bin_start)), int(math.floor(bin_end))
+        return str(start) if start >= end else f"{start} - {end}"
+    return f"{bin_start:.2f} - {bin_end:.2f}"
+
+def numeric_histograms(table, columns: List[str], bins: int = HISTOGRAM_BINS, method: str = 'equal_width') -> pd.DataFrame:
+    """Compute histograms of several numeric columns in a single query
+
+    Bounds come from window aggregates over each column, so no separate min/max
+    query is needed. Equal-width bins on integer columns have whole-number widths,
+    log bins keep values <= 0 in their own bin (bin_num -1) and quantile bins hold
+    roughly equal counts without splitting equal values across bins. NaN and
+    infinite values are counted in a bin of their own (bin_num -2) and left out of
+    the bounds. Constant columns get one bin and all-null columns none.
+    """
+    if method not in BINNING_METHODS:
+        raise ValueError(f"Unknown binning method: {method}")
+    if not columns:
+        return pd.DataFrame(columns=HISTOGRAM_COLUMNS)
+
+    keys = {f'n{i}': col for i, col in enumerate(columns)}
+    integer_keys = [key for key, col in keys.items() if table[col].type().is_integer()]
+    values = (
+        table
+        .select(**{key: table[col].cast('float64') for key, col in keys.items()})
+        .pivot_longer(s.all(), names_to='column_key', values_to='value')
+    )
+    values = values.filter(values.value.notnull())
+    finite = ~(values.value.isnan() | values.value.isinf())
+    # NaN and infinity never reach the bounds or the integer casts of the bin numbers
+    value = ibis.ifelse(finite, values.value, ibis.null().cast('float64'))
+    column_window = ibis.window(group_by=values.column_key)
+    is_integer = values.column_key.isin(integer_keys) if integer_keys else ibis.literal(False)
+
+    if method == 'quantile':
+        lo = value.min().over(column_window)
+        hi = value.max().over(column_window)
+        width = ibis.literal(0.0)
+        # Bins follow the cumulative distribution, so equal values always share a bin
+        cumulative = ibis.cume_dist().over(
+            ibis.window(group_by=[values.column_key, finite], order_by=values.value)
+        )
+        bin_num = ibis.greatest((cumulative * bins).ceil().cast('int64') - 1, 0)
+    elif method == 'log':
+        positive = value > 0
+        lo = ibis.ifelse(positive, value, ibis.null().cast('float64')).min().over(column_window)
+        hi = value.max().over(column_window)
+        log_width = (hi.ln() - lo.ln()) / bins
+        width = ibis.ifelse(log_width > 0, log_width, 1.0)
+        bin_num = ibis.ifelse(
+            positive,
+            ibis.least(((value.ln() - lo.ln()) / width).floor().cast('int64'), bins - 1),
+            NON_POSITIVE_BIN
+        )
+    else:
+        lo = value.min().over(column_window)
+        hi = value.max().over(column_window)
+        # Integer bins cover whole numbers, so the span includes the upper bound itself
+        width = ibis.ifelse(
+            is_integer,
+            ibis.greatest(((hi - lo + 1) / bins).ceil(), 1.0),
+            (hi - lo) / bins
+        )
+        width = ibis.ifelse(width > 0, width, 1.0)
+        bin_num = ibis.least(((value - lo) / width).floor().cast('int64'), bins - 1)
+
+    binned = values.mutate(
+        value=value, bin_num=ibis.ifelse(finite, bin_num, NON_FINITE_BIN), lo=lo, hi=hi, width=width
+    )
+    counts = (
+        binned
+        .group_by([binned.column_key, binned.bin_num])
+        .aggregate(
+            count=lambda t: t.count(),
+            lo=binned.lo.min(),
+            hi=binned.hi.max(),
+            width=binned.width.min(),
+            bin_min=binned.value.min(),
+            bin_max=binned.value.max()
+        )
+    ).execute()
+
+    histograms = []
+    for key, col in keys.items():
+        column_counts = counts[counts['column_key'] == key]
+        if column_counts.empty:
+            continue
+        histograms.append(bin_edges(column_counts, col, bins, method, key in integer_keys))
+
+    if not histograms:
+        return pd.DataFrame(columns=HISTOGRAM_COLUMNS)
+    return pd.concat(histograms, ignore_index=True)[HISTOGRAM_COLUMNS]
+
+def bin_edges(column_counts, column_name, bins, method, is_integer):
+    """Turn one column's bin counts into bins with edges and labels, filling empty bins with 0"""
+    lo, hi, width = column_counts['lo'].min(), column_counts['hi'].max(), column_counts['width'].min()
+    counts = dict(zip(column_counts['bin_num'].astype(int), column_counts['count'].astype(int)))
+    rows = []
+
+    if NON_FINITE_BIN in counts:
+        rows.append((NON_FINITE_BIN, math.nan, math.nan, counts[NON_FINITE_BIN]))
+
+    if pd.isna(lo) and method != 'log':
+        # Every value is NaN or infinite
+        pass
+    elif method == 'quantile':
+        # Quantile bins are only as wide as the values that fell into them; bins left
+        # empty by large groups of equal values are dropped and the rest renumbered
+        quantile_bins = column_counts[column_counts['bin_num'] >= 0].sort_values('bin_num')
+        for bin_num, (bin_min, bin_max, count) in enumerate(
+            quantile_bins[['bin_min', 'bin_max', 'count']].itertuples(index=False)
+        ):
+            rows.append((bin_num, bin_min, bin_max, int(count)))
+    elif method == 'log':
+        if NON_POSITIVE_BIN in counts:
+            bin_min = column_counts.loc[column_counts['bin_num'] == NON_POSITIVE_BIN, 'bin_min'].iloc[0]
+            rows.append((NON_POSITIVE_BIN, bin_min, 0.0, counts[NON_POSITIVE_BIN]))
+        if pd.notna(lo):
+            log_lo = math.log(lo)
+            bin_count = 1 if lo == hi else bins
+            for bin_num in range(bin_count):
+                bin_start = lo if bin_num == 0 else math.exp(log_lo + bin_num * width)
+                bin_end = hi if bin_num == bin_count - 1 else math.exp(log_lo + (bin_num + 1) * width)
+                rows.append((bin_num, bin_start, bin_end, counts.get(bin_num, 0)))
+    elif lo == hi:
+        rows.append((0, lo, hi, counts.get(0, 0)))
+    else:
+        bin_count = min(bins, int(math.ceil((hi - lo + 1) / width))) if is_integer else bins
+        for bin_num in range(bin_count):
+            bin_start = lo + bin_num * width
+            if is_integer:
+                bin_end = min(hi, bin_start + width - 1)
+            else:
+                bin_end = hi if bin_num == bin_count - 1 else lo + (bin_num + 1) * width
+            rows.append((bin_num, bin_start, bin_end, counts.get(bin_num, 0)))
+
+    histogram = pd.DataFrame(rows, columns=['bin_num', 'bin_start', 'bin_end', 'count'])
+    histogram['column_name'] = column_name
+    histogram['label'] = [
+        'NaN / infinite' if bin_num == NON_FINITE_BIN else bin_label(bin_start, bin_end, is_integer)
+        for bin_num, bin_start, bin_end in histogram[['bin_num', 'bin_start', 'bin_end']].itertuples(index=False)
+    ]
+    return histogram
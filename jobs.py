@@ -0,0 +1,217 @@
+import json
+import time
+import uuid
+import logging
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from catalog import catalog_connection
+from profiler import load_saved_connections, create_connection, generate_profile
+
+logger = logging.getLogger(__name__)
+
+# Background threads running queued profiling jobs in each app process
+JOB_WORKERS = 2
+
+# Seconds an idle worker waits before looking for new jobs
+JOB_POLL_SECONDS = 2
+
+# Running jobs record a heartbeat this often; jobs silent for three heartbeats are requeued
+JOB_HEARTBEAT_SECONDS = 30
+
+# Minimum seconds between progress writes of one job
+JOB_PROGRESS_SECONDS = 1
+
+_workers = []
+_workers_lock = threading.Lock()
+
+def ensure_jobs_table(catalog_db):
+    """Create the profiling job queue table if needed"""
+    catalog_db.execute("""
+        CREATE TABLE IF NOT EXISTS profile_jobs (
+            job_id VARCHAR PRIMARY KEY,
+            connection_name VARCHAR,
+            schema_name VARCHAR,
+            table_name VARCHAR,
+            options VARCHAR,
+            status VARCHAR,
+            completed_stage VARCHAR,
+            progress DOUBLE,
+            message VARCHAR,
+            attempts INTEGER,
+            submitted_at TIMESTAMP,
+            started_at TIMESTAMP,
+            heartbeat_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    """)
+
+@contextmanager
+def jobs_connection():
+    """Short-lived catalog connection with the job table in place"""
+    with catalog_connection() as catalog_db:
+        ensure_jobs_table(catalog_db)
+        yield catalog_db
+
+def submit_job(connection_name: str, schema: str, table: str, options: Dict[str, Any]) -> str:
+    """Queue a table for background profiling with generate_profile options"""
+    job_id = uuid.uuid4().hex
+    with jobs_connection() as catalog_db:
+        catalog_db.execute("""
+            INSERT INTO profile_jobs
+            (job_id, connection_name, schema_name, table_name, options, status, progress, attempts, submitted_at)
+            VALUES (?, ?, ?, ?, ?, 'queued', 0.0, 0, ?)
+        """, [job_id, connection_name, schema, table, json.dumps(options), datetime.now()])
+    return job_id
+
+def list_jobs(limit: int = 50) -> pd.DataFrame:
+    """Most recently submitted jobs, newest first"""
+    with jobs_connection() as catalog_db:
+        return catalog_db.execute("""
+            SELECT job_id, connection_name, schema_name, table_name, status, completed_stage,
+                   progress, message, attempts, submitted_at, started_at, finished_at
+            FROM profile_jobs
+            ORDER BY submitted_at DESC
+            LIMIT ?
+        """, [limit]).df()
+
+def update_job(job_id: str, **fields) -> None:
+    """Set columns of a job row"""
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    with jobs_connection() as catalog_db:
+        catalog_db.execute(
+            f"UPDATE profile_jobs SET {assignments} WHERE job_id = ?",
+            [*fields.values(), job_id]
+        )
+
+def cancel_job(job_id: str) -> None:
+    """Cancel a job that has not started yet"""
+    with jobs_connection() as catalog_db:
+        catalog_db.execute("""
+            UPDATE profile_jobs SET status = 'cancelled', finished_at = ?
+            WHERE job_id = ? AND status = 'queued'
+        """, [datetime.now(), job_id])
+
+def requeue_stale_jobs() -> None:
+    """Return running jobs whose worker stopped sending heartbeats to the queue"""
+    stale_before = datetime.now() - timedelta(seconds=3 * JOB_HEARTBEAT_SECONDS)
+    with jobs_connection() as catalog_db:
+        catalog_db.execute("""
+            UPDATE profile_jobs SET status = 'queued', message = 'Requeued after the worker stopped responding'
+            WHERE status = 'running' AND heartbeat_at < ?
+        """, [stale_before])
+
+def claim_next_job() -> Optional[Dict[str, Any]]:
+    """Mark the oldest queued job as running and return it, or None if the queue is empty"""
+    with jobs_connection() as catalog_db:
+        jobs = catalog_db.execute("""
+            SELECT * FROM profile_jobs
+            WHERE status = 'queued'
+            ORDER BY submitted_at
+            LIMIT 1
+        """).df()
+        if jobs.empty:
+            return None
+
+        job = {key: (None if pd.isna(value) else value) for key, value in jobs.iloc[0].to_dict().items()}
+        now = datetime.now()
+        catalog_db.execute("""
+            UPDATE profile_jobs
+            SET status = 'running', started_at = ?, heartbeat_at = ?, attempts = attempts + 1
+            WHERE job_id = ?
+        """, [now, now, job['job_id']])
+        return job
+
+class JobProgress:
+    """Progress bar stand-in that records a job's progress in the queue table"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.last_write = 0.0
+
+    def progress(self, value, text=None):
+        now = time.monotonic()
+        if value < 1.0 and now - self.last_write < JOB_PROGRESS_SECONDS:
+            return
+        self.last_write = now
+        update_job(self.job_id, progress=float(value), message=text, heartbeat_at=datetime.now())
+
+def run_job(job: Dict[str, Any]) -> None:
+    """Profile the table of a claimed job, resuming after the last stage it completed"""
+    job_id = job['job_id']
+    if job['completed_stage'] == 'cataloged':
+        update_job(job_id, status='completed', progress=1.0, finished_at=datetime.now())
+        return
+
+    # Keep the heartbeat going through long stages that do not report progress
+    stopped = threading.Event()
+    def heartbeat():
+        while not stopped.wait(JOB_HEARTBEAT_SECONDS):
+            update_job(job_id, heartbeat_at=datetime.now())
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    errors = []
+    def notify(level, message):
+        logger.log(logging.getLevelName(level.upper()), message)
+        if level == 'error':
+            errors.append(message)
+
+    connection = None
+    try:
+        saved = load_saved_connections().get(job['connection_name'])
+        if saved is None:
+            raise ValueError(f"Saved connection '{job['connection_name']}' no longer exists")
+        connection = create_connection(saved['type'], saved['params'], notify=notify)
+        if connection is None:
+            raise ConnectionError(errors[-1] if errors else "Could not connect")
+
+        success, duration = generate_profile(
+            connection=connection,
+            schema=job['schema_name'],
+            table=job['table_name'],
+            progress_bar=JobProgress(job_id),
+            connection_name=job['connection_name'],
+            notify=notify,
+            on_stage=lambda stage: update_job(job_id, completed_stage=stage),
+            reuse_export=job['completed_stage'] in ('exported', 'summarized'),
+            **json.loads(job['options'])
+        )
+        if success:
+            update_job(job_id, status='completed', progress=1.0, finished_at=datetime.now(),
+                       message=f"Complete! Time taken: {duration}")
+        else:
+            update_job(job_id, status='failed', finished_at=datetime.now(),
+                       message=errors[-1] if errors else "Profiling failed")
+    except Exception as e:
+        update_job(job_id, status='failed', finished_at=datetime.now(), message=str(e))
+    finally:
+        stopped.set()
+        disconnect = getattr(connection, 'disconnect', None)
+        if disconnect:
+            disconnect()
+
+def worker_loop() -> None:
+    """Run queued jobs one after another for the lifetime of the process"""
+    while True:
+        try:
+            requeue_stale_jobs()
+            job = claim_next_job()
+        except Exception as e:
+            logger.error(f"Could not read the profiling job queue: {str(e)}")
+            job = None
+
+        if job is None:
+            time.sleep(JOB_POLL_SECONDS)
+        else:
+            run_job(job)
+
+def start_job_workers(workers: int = JOB_WORKERS) -> None:
+    """Start the background job workers of this process if they are not running yet"""
+    with _workers_lock:
+        _workers[:] = [worker for worker in _workers if worker.is_alive()]
+        for _ in range(workers - len(_workers)):
+            worker = threading.Thread(target=worker_loop, name="profile-job-worker", daemon=True)
+            worker.start()
+            _workers.append(worker)
@@ -1,56 +1,86 @@
 import streamlit as st
-import ibis
-import json
-from pathlib import Path
+import threading
 import pandas as pd
-import duckdb
-from datetime import datetime
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from st_aggrid import GridOptionsBuilder, AgGrid, GridUpdateMode, DataReturnMode
+from sketches import hll_relative_error
+from histograms import HISTOGRAM_BINS, BINNING_METHODS
+from connection_pool import get_pooled_connection, hold_pooled_connection
+from file_sources import is_file_source
+import profiler
+from profiler import load_saved_connections, generate_profile, list_tables_from_information_schema
+from jobs import JOB_POLL_SECONDS, submit_job, list_jobs, cancel_job, start_job_workers
 
-def load_saved_connections():
-    """Load saved connections from a JSON file"""
-    config_path = Path("connections.json")
-    if config_path.exists():
-        with open(config_path, "r") as f:
-            return json.load(f)
-    return {}
+def streamlit_notify(level, message):
+    """Show profiling messages on the page"""
+    getattr(st, level)(message)
 
-def create_connection(db_type: str, params: Dict[str, Any]) -> Optional[ibis.BaseBackend]:
-    """Create database connection using Ibis"""
-    try:
-        connection_method = getattr(ibis, db_type.lower())
-        
-        # For databases that only need a path parameter, pass the path string directly
-        if len(params) == 1 and "path" in params:
-            return connection_method.connect(params["path"])
-            
-        return connection_method.connect(**params)
-    except Exception as e:
-        st.error(f"Connection error: {str(e)}")
-        return None
+def create_connection(db_type, params):
+    """Create database connection using Ibis, reporting errors on the page"""
+    return profiler.create_connection(db_type, params, notify=streamlit_notify)
 
-def get_schema_info(connection):
-    """Get schema and table information using Ibis"""
+# Seconds a discovered schema/table listing is reused before the database is queried again
+SCHEMA_CACHE_TTL_SECONDS = 30 * 60
+
+# Worker connections used to list schemas when information_schema is not available
+SCHEMA_DISCOVERY_WORKERS = 8
+
+def list_tables_in_parallel(db_type, params, schemas):
+    """List tables schema by schema on worker threads, each with its own connection"""
+    worker_state = threading.local()
+    worker_connections = []
+    connections_lock = threading.Lock()
+    script_ctx = get_script_run_ctx()
+    
+    def list_schema(schema):
+        if not hasattr(worker_state, 'connection'):
+            worker_state.connection = create_connection(db_type, params)
+            with connections_lock:
+                worker_connections.append(worker_state.connection)
+        if worker_state.connection is None:
+            raise RuntimeError("Could not open a connection for schema discovery")
+        return schema, worker_state.connection.list_tables(database=schema)
+    
     try:
-        schemas = connection.list_databases()
-        schema_tables = {}
+        with ThreadPoolExecutor(
+            max_workers=min(SCHEMA_DISCOVERY_WORKERS, max(len(schemas), 1)),
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), script_ctx)
+        ) as executor:
+            return dict(executor.map(list_schema, schemas))
+    finally:
+        for connection in worker_connections:
+            disconnect = getattr(connection, 'disconnect', None)
+            if connection is not None and disconnect:
+                disconnect()
+
+@st.cache_data(ttl=SCHEMA_CACHE_TTL_SECONDS, show_spinner="Discovering schemas and tables...")
+def get_schema_info(connection_name, _connection, db_type, params):
+    """Get schema and table information using Ibis
+    
+    Uses one information_schema query where the backend has one and falls back to
+    listing schemas in parallel. Results are cached per saved connection for
+    SCHEMA_CACHE_TTL_SECONDS; errors are raised so they are not cached. The pooled
+    connection is only held while the database is queried on a cache miss.
+    """
+    with hold_pooled_connection(connection_name):
+        schemas = _connection.list_databases()
+        
+        try:
+            schema_tables = list_tables_from_information_schema(_connection, schemas)
+        except Exception:
+            schema_tables = list_tables_in_parallel(db_type, params, schemas)
+        
+        # Only keep schemas that have tables
+        schema_tables = {schema: tables for schema, tables in schema_tables.items() if tables}
         
-        for schema in schemas:
-            tables = connection.list_tables(database=schema)
-            if tables:  # Only add schemas that have tables
-                schema_tables[schema] = tables
-                
         # If no schemas found, try getting tables from default schema
         if not schema_tables:
-            tables = connection.list_tables()
+            tables = _connection.list_tables()
             if tables:
                 schema_tables["default"] = tables
-                
-        return schema_tables
-    except Exception as e:
-        st.error(f"Error fetching schema information: {str(e)}")
-        return {}
+    
+    return schema_tables
 
 def get_table_schema(connection, table, schema=None):
     """Get table schema information"""
@@ -77,155 +107,105 @@ def get_table_schema(connection, table, schema=None):
         st.error(f"Error getting table schema: {str(e)}")
         return pd.DataFrame(columns=['Column', 'Type'])
     
-def generate_profile(connection, schema, table, progress_bar, connection_name):
-    """Generate profile for a table using Ibis compiled SQL"""
+def profile_table_task(db_type, params, connection_name, schema, table, progress_bar, profile_options):
+    """Profile one table on its own database connection, closed when the profile ends
+    
+    Profiles can run for hours, so they never hold the pooled connection other
+    sessions browse schemas with.
+    """
+    connection = create_connection(db_type, params)
+    if connection is None:
+        return None, None
     try:
-        table_start_time = datetime.now()
-        
-        # Get table reference
-        if schema and schema != "default":
-            table_obj = connection.table(table, schema=schema)
-        else:
-            table_obj = connection.table(table)
-        
-        # Create directory structure
-        base_dir = Path("data_profiles")
-        conn_dir = base_dir / connection_name
-        schema_dir = conn_dir / schema
-        table_dir = schema_dir / table
-        table_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Define paths
-        data_path = table_dir / "data.parquet"
-        summary_path = table_dir / "summary.parquet"
-        pattern_path = table_dir / "patterns.parquet"
-        
-        # Get column names
-        columns = table_obj.columns
-        total_columns = len(columns)
-        
-        # Export raw data to parquet
-        progress_bar.progress(0.2, f"Exporting {table} to parquet...")
-        table_obj.to_parquet(str(data_path))
-        
-        # Create a new table reference from the parquet file
-        parquet_table = ibis.read_parquet(str(data_path))
-        
-        # Get total rows first
-        total_rows = parquet_table.count().execute()
-        
-        progress_bar.progress(0.4, "Analyzing columns...")
-        # Process each column
-        summary_data = []
-        
-        # Create pattern expressions for string columns
-        pattern_expressions = {}
-        for col in columns:
-            column_type = str(parquet_table[col].type())
-            if 'string' in column_type.lower():
-                pattern_expressions[col] = (
-                    parquet_table[col]
-                    .cast('string')
-                    # Replace lowercase letters with lowercase a
-                    .re_replace(r'[a-z]', 'a')
-                    # Replace uppercase letters with uppercase A
-                    .re_replace(r'[A-Z]', 'A')
-                    # Replace numbers with N
-                    .re_replace(r'[0-9]', 'N')
-                ).name(col)
+        return generate_profile(
+            connection=connection,
+            schema=schema,
+            table=table,
+            progress_bar=progress_bar,
+            connection_name=connection_name,
+            notify=streamlit_notify,
+            **profile_options
+        )
+    finally:
+        disconnect = getattr(connection, 'disconnect', None)
+        if disconnect:
+            disconnect()
+
+def profile_tables_parallel(db_type, params, connection_name, tables, max_workers, profile_options):
+    """Profile several tables concurrently, reporting each table as it finishes"""
+    # Progress bars are created up front so every table keeps its own bar
+    progress_bars = {}
+    for schema, table in tables:
+        st.write(f"Profiling {schema}.{table}")
+        progress_bars[(schema, table)] = st.progress(0, "Queued...")
+    
+    # Worker threads need the script context to update Streamlit elements
+    script_ctx = get_script_run_ctx()
+    
+    with ThreadPoolExecutor(
+        max_workers=max_workers,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), script_ctx)
+    ) as executor:
+        futures = {
+            executor.submit(
+                profile_table_task,
+                db_type,
+                params,
+                connection_name,
+                schema,
+                table,
+                progress_bars[(schema, table)],
+                profile_options
+            ): (schema, table)
+            for schema, table in tables
+        }
         
-        # Generate patterns table if there are string columns
-        if pattern_expressions:
-            progress_bar.progress(0.5, "Generating patterns...")
-            patterns_expr = parquet_table.mutate(**pattern_expressions)
-            patterns_df = patterns_expr.select(list(pattern_expressions.keys())).execute()
-            patterns_df.to_parquet(str(pattern_path))
-
-
-        # Process column metrics
-        for i, col in enumerate(columns):
-            progress = 0.6 + (0.3 * (i / total_columns))
-            progress_bar.progress(progress, f"Analyzing column: {col}")
+        for future in as_completed(futures):
+            schema, table = futures[future]
+            try:
+                success, duration = future.result()
+            except Exception as e:
+                st.error(f"Error profiling {schema}.{table}: {str(e)}")
+                success, duration = None, None
             
-            metrics = [
-                parquet_table[col].isnull().sum().name('null_count'),
-                parquet_table[col].nunique().name('unique_count')
-            ]
-            results = parquet_table.aggregate(metrics).execute()
-            
-            summary_data.append({
-                'column_name': col,
-                'row_count': int(total_rows),
-                'null_count': int(results['null_count'].iloc[0]),
-                'unique_count': int(results['unique_count'].iloc[0]),
-                'schema_name': schema,
-                'table_name': table,
-                'profile_date': datetime.now(),
-                'connection_name': connection_name,
-                'has_patterns': 'string' in str(parquet_table[col].type()).lower()
-            })
-        
-        progress_bar.progress(0.9, "Saving results...")
-        # Save summary
-        summary_df = pd.DataFrame(summary_data)
-        summary_df.to_parquet(str(summary_path))
-        
-        # Update catalog
-        catalog_db = duckdb.connect('profiles.db')
-        
-        # Create catalog table if it doesn't exist
-        catalog_db.execute("""
-            CREATE TABLE IF NOT EXISTS profile_catalog (
-                connection_name VARCHAR,
-                schema_name VARCHAR,
-                table_name VARCHAR,
-                data_path VARCHAR,
-                summary_path VARCHAR,
-                pattern_path VARCHAR,
-                last_profiled TIMESTAMP,
-                PRIMARY KEY (connection_name, schema_name, table_name)
-            )
-        """)
-        
-        # Delete existing entry if it exists
-        catalog_db.execute("""
-            DELETE FROM profile_catalog 
-            WHERE connection_name = ? 
-            AND schema_name = ? 
-            AND table_name = ?
-        """, [connection_name, schema, table])
-        
-        # Insert new entry
-        catalog_db.execute("""
-            INSERT INTO profile_catalog 
-            (connection_name, schema_name, table_name, data_path, summary_path, pattern_path, last_profiled)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, [
-            connection_name, 
-            schema, 
-            table, 
-            str(data_path),
-            str(summary_path),
-            str(pattern_path) if pattern_expressions else None,
-            datetime.now()
-        ])
-        
-        # Complete the progress
-        table_end_time = datetime.now()
-        duration = table_end_time - table_start_time
-        progress_bar.progress(1.0, f"Complete! Time taken: {duration}")
-        
-        return True, duration
+            if success:
+                st.success(f"Successfully profiled {schema}.{table} in {duration}")
+            else:
+                st.error(f"Failed to profile {schema}.{table}")
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_profile_jobs():
+    """Show background profiling jobs, refreshing their status while the page is open"""
+    jobs = list_jobs()
+    if jobs.empty:
+        st.caption("No background profiling jobs yet.")
+        return
     
-    except Exception as e:
-        st.error(f"Error profiling {schema}.{table}: {str(e)}")
-        return None, None
+    st.dataframe(
+        jobs.drop(columns='job_id'),
+        column_config={
+            'progress': st.column_config.ProgressColumn("Progress", min_value=0.0, max_value=1.0)
+        },
+        hide_index=True
+    )
+    
+    queued = jobs[jobs['status'] == 'queued']
+    if not queued.empty:
+        labels = dict(zip(queued['job_id'], queued['schema_name'] + '.' + queued['table_name']))
+        to_cancel = st.selectbox("Cancel a queued job", list(labels), format_func=labels.get, index=None)
+        if to_cancel and st.button("Cancel job"):
+            cancel_job(to_cancel)
 
 def main():
     st.title("Connection Explorer")
 
     st.logo("https://infoblueprint.co.za/wp-content/uploads/2021/06/infoblueprint-logo-600px.png")
 
+    # Jobs keep running in the background when the page is left or reloaded
+    start_job_workers()
+    with st.expander("Background profiling jobs"):
+        show_profile_jobs()
+
     # Initialize session state for selected tables
     if 'selected_tables' not in st.session_state:
         st.session_state.selected_tables = set()
@@ -251,15 +231,21 @@ def main():
         db_type = connection_info["type"]
         params = connection_info["params"]
 
-        # Create connection
+        # Reuse the pooled connection across reruns; only the first use connects
         with st.spinner("Connecting to database..."):
-            conn = create_connection(db_type, params)
+            conn = get_pooled_connection(selected_connection, db_type, params, create_connection)
 
         if conn:
             st.success(f"Connected to {db_type}")
 
-            # Get schema information
-            schema_info = get_schema_info(conn)
+            # Get schema information, cached until it expires or is refreshed
+            if st.button("Refresh schemas"):
+                get_schema_info.clear()
+            try:
+                schema_info = get_schema_info(selected_connection, conn, db_type, params)
+            except Exception as e:
+                st.error(f"Error fetching schema information: {str(e)}")
+                schema_info = {}
 
             if schema_info:
                 # Create table data
@@ -343,30 +329,146 @@ def main():
                 # Check if there are any selected rows
                 if selected_rows is not None and len(selected_rows) > 0:
                     st.write("Selected rows:", selected_rows)
+                    push_down = st.checkbox(
+                        "Push-down profiling",
+                        # File sources are read in place rather than copied to parquet again
+                        value=is_file_source(db_type),
+                        help="Run the profiling queries on the source database instead of exporting "
+                             "each table to parquet first. Only aggregated results are stored."
+                    )
+                    
+                    sample_choice = st.selectbox(
+                        "Sampling",
+                        ["Full table", "Bernoulli sample", "Reservoir sample"],
+                        help="Profile a sample instead of every row. Null and unique counts "
+                             "are then estimates with approximate 95% error bounds."
+                    )
+                    sample_method, sample_size = None, None
+                    if sample_choice == "Bernoulli sample":
+                        sample_method = 'bernoulli'
+                        sample_size = st.number_input(
+                            "Sample size (% of rows)",
+                            min_value=0.01,
+                            max_value=100.0,
+                            value=1.0
+                        ) / 100.0
+                    elif sample_choice == "Reservoir sample":
+                        sample_method = 'reservoir'
+                        sample_size = st.number_input(
+                            "Sample size (rows)",
+                            min_value=1000,
+                            value=100_000,
+                            step=10_000
+                        )
+                    
+                    use_sketches = st.checkbox(
+                        "Approximate unique counts (HyperLogLog)",
+                        value=False,
+                        disabled=sample_method is not None,
+                        help=f"Estimate unique counts with mergeable HyperLogLog sketches "
+                             f"(about {hll_relative_error():.1%} relative error) instead of exact "
+                             f"distinct counts. Uses far less memory on high-cardinality columns."
+                    )
+                    
+                    watermark_column = st.text_input(
+                        "Watermark column (incremental re-profiling)",
+                        help="An increasing column such as updated_at or an ID. Unchanged tables are "
+                             "skipped and only rows past the last profiled watermark are profiled and "
+                             "merged. Unique counts are HyperLogLog estimates so they can be merged. "
+                             "Tables without this column get a full profile."
+                    ).strip() or None
+                    if watermark_column and sample_method:
+                        st.warning(
+                            "Incremental profiling reads every new row, so the sampling option is not "
+                            "used for tables that have the watermark column."
+                        )
+                    
+                    histogram_col1, histogram_col2 = st.columns(2)
+                    with histogram_col1:
+                        histogram_bins = st.number_input(
+                            "Histogram bins",
+                            min_value=2,
+                            max_value=100,
+                            value=HISTOGRAM_BINS,
+                            help="Number of bins in numeric column histograms."
+                        )
+                    with histogram_col2:
+                        histogram_method = st.selectbox(
+                            "Numeric binning",
+                            BINNING_METHODS,
+                            format_func=lambda method: method.replace('_', ' ').capitalize(),
+                            help="Equal width splits the value range evenly, quantile puts about the same "
+                                 "number of rows in each bin and log spaces bins evenly on a log scale."
+                        )
+                    
+                    max_workers = st.number_input(
+                        "Tables to profile in parallel",
+                        min_value=1,
+                        max_value=16,
+                        value=1,
+                        help="Each parallel worker opens its own connection to the database."
+                    )
+                    
+                    run_in_background = st.checkbox(
+                        "Run in background",
+                        value=False,
+                        help="Queue the tables as background jobs that keep running when this page "
+                             "is closed or reloaded. Interrupted jobs resume after their last completed stage."
+                    )
+                    
                     # Create a button to trigger profiling
                     if st.button("Profile Selected Tables"):
+                        profile_options = {
+                            'push_down': push_down,
+                            'sample_method': sample_method,
+                            'sample_size': sample_size,
+                            'use_sketches': use_sketches,
+                            'watermark_column': watermark_column,
+                            'histogram_bins': int(histogram_bins),
+                            'histogram_method': histogram_method
+                        }
+                        selected_df = pd.DataFrame(selected_rows)
+                        
+                        if run_in_background:
+                            for _, row in selected_df.iterrows():
+                                submit_job(selected_connection, row['Schema'], row['Table'], profile_options)
+                            st.success(f"Queued {len(selected_df)} table(s) for background profiling")
+                            return
+                        
                         with st.spinner("Profiling selected tables..."):
-                            for _, row in pd.DataFrame(selected_rows).iterrows():
-                                schema = row['Schema']
-                                table = row['Table']
-                                
-                                # Create a progress bar for each table
-                                progress_bar = st.progress(0)
-                                st.write(f"Profiling {schema}.{table}")
-                                
-                                # Generate profile for the selected table
-                                success, duration = generate_profile(
-                                    connection=conn,
-                                    schema=schema,
-                                    table=table,
-                                    progress_bar=progress_bar,
-                                    connection_name=selected_connection
+                            if max_workers == 1:
+                                for _, row in selected_df.iterrows():
+                                    schema = row['Schema']
+                                    table = row['Table']
+                                    
+                                    # Create a progress bar for each table
+                                    progress_bar = st.progress(0)
+                                    st.write(f"Profiling {schema}.{table}")
+                                    
+                                    # Generate profile for the selected table
+                                    success, duration = profile_table_task(
+                                        db_type,
+                                        params,
+                                        selected_connection,
+                                        schema,
+                                        table,
+                                        progress_bar,
+                                        profile_options
+                                    )
+                                    
+                                    if success:
+                                        st.success(f"Successfully profiled {schema}.{table} in {duration}")
+                                    else:
+                                        st.error(f"Failed to profile {schema}.{table}")
+                            else:
+                                profile_tables_parallel(
+                                    db_type,
+                                    params,
+                                    selected_connection,
+                                    list(zip(selected_df['Schema'], selected_df['Table'])),
+                                    max_workers,
+                                    profile_options
                                 )
-                                
-                                if success:
-                                    st.success(f"Successfully profiled {schema}.{table} in {duration}")
-                                else:
-                                    st.error(f"Failed to profile {schema}.{table}")
                 else:
                     st.info("Please select tables to profile")
 
@@ -1,23 +1,20 @@
 import streamlit as st
 import pandas as pd
 import ibis
+from pathlib import Path
+from histograms import numeric_histograms
+from catalog import catalog_entries, get_catalog_entry, delete_catalog_entries
+from profile_cache import cached_by_profile_version
+from profile_runs import get_profile_runs
+from duckdb_settings import connect_ibis_duckdb
 
 def get_profiled_tables():
     """Get list of profiled tables from catalog"""
     try:
-        # Create Ibis connection to catalog
-        catalog_con = ibis.duckdb.connect('profiles.db')
-        
-        # First check if the table exists
-        table_exists = catalog_con.list_tables()
-        if 'profile_catalog' not in table_exists:
-            # Return empty DataFrame if table doesn't exist
+        # Get base catalog information from the shared catalog index
+        tables = catalog_entries()
+        if tables.empty:
             return pd.DataFrame()
-            
-        catalog_table = catalog_con.table('profile_catalog')
-        
-        # Get base catalog information
-        tables = catalog_table.execute()
         
         # Process each table to get metrics using Ibis
         table_metrics = []
@@ -26,7 +23,7 @@ def get_profiled_tables():
         for _, row in tables.iterrows():
             try:
                 # Create Ibis connection to summary parquet
-                summary_con = ibis.duckdb.connect()
+                summary_con = connect_ibis_duckdb()
                 summary_table = summary_con.read_parquet(row['summary_path'])
                 
                 # Get metrics using Ibis expressions and ensure scalar values
@@ -47,34 +44,13 @@ def get_profiled_tables():
                 })
             except Exception as e:
                 st.warning(f"Could not fetch metrics for {row['schema_name']}.{row['table_name']}: {str(e)}")
-                invalid_records.append({
-                    'connection_name': row['connection_name'],
-                    'schema_name': row['schema_name'],
-                    'table_name': row['table_name']
-                })
+                invalid_records.append((row['connection_name'], row['schema_name'], row['table_name']))
                 continue
         
         # Remove invalid records from the catalog
         if invalid_records:
             try:
-                # Create direct DuckDB connection
-                import duckdb
-                duckdb_conn = duckdb.connect('profiles.db')
-                
-                for record in invalid_records:
-                    delete_sql = """
-                    DELETE FROM profile_catalog 
-                    WHERE connection_name = ? 
-                    AND schema_name = ? 
-                    AND table_name = ?
-                    """
-                    duckdb_conn.execute(delete_sql, 
-                                      [record['connection_name'],
-                                       record['schema_name'],
-                                       record['table_name']])
-                
-                duckdb_conn.commit()
-                duckdb_conn.close()
+                delete_catalog_entries(invalid_records)
                 st.info(f"Removed {len(invalid_records)} invalid records from the catalog")
             except Exception as e:
                 st.error(f"Error removing invalid records from catalog: {str(e)}")
@@ -84,27 +60,22 @@ def get_profiled_tables():
         st.error(f"Error fetching profiled tables: {str(e)}")
         return pd.DataFrame()
 
+def raw_data_unavailable(data_path, analysis):
+    """Report analyses that need exported raw data when the profile was pushed down"""
+    if pd.isna(data_path):
+        st.info(f"{analysis} is not available for push-down profiles because the raw data was not exported.")
+        return True
+    return False
+
+@cached_by_profile_version
 def get_table_profile(connection_name, schema, table):
     """Get detailed profile for a specific table"""
     try:
-        # Get summary path from catalog using Ibis
-        catalog_con = ibis.duckdb.connect('profiles.db')
-        catalog_table = catalog_con.table('profile_catalog')
-        
-        # Filter for specific table
-        summary_path = (
-            catalog_table.filter(
-                (catalog_table.connection_name == connection_name) &
-                (catalog_table.schema_name == schema) &
-                (catalog_table.table_name == table)
-            )
-            .summary_path
-            .execute()
-            .iloc[0]
-        )
+        # Get summary path from the catalog index
+        summary_path = get_catalog_entry(connection_name, schema, table)['summary_path']
         
         # Read summary parquet using Ibis
-        summary_con = ibis.duckdb.connect()
+        summary_con = connect_ibis_duckdb()
         summary_table = summary_con.read_parquet(summary_path)
         
         # Calculate percentages using Ibis expressions
@@ -115,88 +86,103 @@ def get_table_profile(connection_name, schema, table):
              summary_table.row_count.cast('float')).name('unique_percentage')
         ]).execute()
         
+        # Profiles written before sampling was available are exact full-table counts
+        sample_defaults = {
+            'is_estimate': False,
+            'unique_count_method': 'exact',
+            'sample_method': None,
+            'sample_repeatable': True,
+            'sample_rows': profile['row_count'],
+            'sample_fraction': 1.0,
+            'null_pct_error': 0.0,
+            'unique_pct_error': 0.0
+        }
+        for column, default in sample_defaults.items():
+            if column not in profile.columns:
+                profile[column] = default
+        
         return profile.sort_values('column_name')
     except Exception as e:
         st.error(f"Error fetching profile: {str(e)}")
         return pd.DataFrame()
 
+# Metrics shown in the Column Profile tab for each kind of column, in display order
+COLUMN_METRICS = {
+    'string': ['count', 'null_count', 'unique_count', 'blank_count', 'min_value', 'max_value',
+               'min_length', 'max_length', 'avg_length'],
+    'numeric': ['count', 'null_count', 'unique_count', 'min_value', 'max_value', 'mean', 'std_dev', 'median'],
+    'temporal': ['count', 'null_count', 'unique_count', 'min_value', 'max_value'],
+    'other': ['count', 'null_count', 'unique_count']
+}
+
+# Summary columns only used by the Column Profile tab or for merging incremental runs
+STORED_METRIC_COLUMNS = [
+    'column_kind', 'min_value', 'max_value', 'mean', 'std_dev', 'median',
+    'blank_count', 'min_key', 'max_key', 'min_length', 'max_length', 'avg_length'
+]
+
+@cached_by_profile_version
 def get_column_metrics(connection_name, schema, table, column):
     """Get detailed metrics for a specific column using Ibis"""
     try:
-        # Get data path from catalog
-        catalog_con = ibis.duckdb.connect('profiles.db')
-        catalog_table = catalog_con.table('profile_catalog')
-        
-        data_path = (
-            catalog_table.filter(
-                (catalog_table.connection_name == connection_name) &
-                (catalog_table.schema_name == schema) &
-                (catalog_table.table_name == table)
+        # Profiles store type-specific metrics in the summary, so no data scan is needed
+        profile = get_table_profile(connection_name, schema, table)
+        if 'column_kind' in profile.columns:
+            column_profile = profile[profile['column_name'] == column].iloc[0]
+            kind = column_profile['column_kind']
+            
+            metrics = column_profile.to_dict()
+            # Strings count every row, other types count non-null values
+            metrics['count'] = (
+                metrics['row_count'] if kind == 'string'
+                else metrics['row_count'] - metrics['null_count']
             )
-            .data_path
-            .execute()
-            .iloc[0]
-        )
+            return pd.DataFrame([{metric: metrics.get(metric) for metric in COLUMN_METRICS[kind]}])
         
-        # Read data using DuckDB directly for better string handling
-        import duckdb
-        conn = duckdb.connect()
-        df = conn.read_parquet(data_path).df()
+        # Get data path from the catalog index
+        data_path = get_catalog_entry(connection_name, schema, table)['data_path']
         
-        # Get column type from the original Ibis connection
-        data_con = ibis.duckdb.connect()
-        table_data = data_con.read_parquet(data_path)
+        if pd.isna(data_path):
+            # Push-down profiles only have the stored summary counts
+            return (
+                profile[profile['column_name'] == column][['row_count', 'null_count', 'unique_count']]
+                .rename(columns={'row_count': 'count'})
+                .reset_index(drop=True)
+            )
+        
+        # Read only the selected column; DuckDB projects it out of the parquet files
+        data_con = connect_ibis_duckdb()
+        table_data = data_con.read_parquet(data_path).select(column)
         column_data = table_data[column]
         column_type = str(column_data.type())
         
         # Create metrics based on data type
         if 'string' in column_type.lower():
-            # Filter out nulls and empty strings
-            non_empty_df = df[df[column].notna() & (df[column].str.strip() != '')]
-            
-            # Get basic metrics
-            basic_metrics = pd.DataFrame({
-                'count': [len(df)],
-                'null_count': [df[column].isna().sum()],
-                'unique_count': [df[column].nunique()]
-            })
+            # Min/max and lengths ignore nulls and blank strings
+            non_empty = column_data.notnull() & (column_data.strip() != '')
             
-            # Get min/max using normalized strings
-            if not non_empty_df.empty:
-                # Normalize strings for comparison
-                normalized = non_empty_df[column].str.strip().str.upper().str.replace(r'[^\w\s]', '')
-                
-                # Get original values corresponding to min/max of normalized strings
-                min_value = non_empty_df.loc[normalized.idxmin(), column]
-                max_value = non_empty_df.loc[normalized.idxmax(), column]
-                
-                non_empty_metrics = pd.DataFrame({
-                    'min_value': [min_value],
-                    'max_value': [max_value]
-                })
-            else:
-                non_empty_metrics = pd.DataFrame({
-                    'min_value': [None],
-                    'max_value': [None]
-                })
+            # Compare strings normalized: trimmed, upper-cased and without punctuation
+            normalized = column_data.strip().upper().re_replace(r'[^\w\s]', '')
+            lengths = column_data.length()
             
-            # Get length metrics
-            if not non_empty_df.empty:
-                lengths = non_empty_df[column].str.len()
-                length_metrics = pd.DataFrame({
-                    'min_length': [lengths.min()],
-                    'max_length': [lengths.max()],
-                    'avg_length': [lengths.mean()]
-                })
-            else:
-                length_metrics = pd.DataFrame({
-                    'min_length': [0],
-                    'max_length': [0],
-                    'avg_length': [0]
-                })
+            metrics = (
+                table_data.aggregate([
+                    table_data.count().name('count'),
+                    column_data.isnull().sum().name('null_count'),
+                    column_data.nunique().name('unique_count'),
+                    (column_data.notnull() & (column_data.strip() == '')).cast('int64').sum().name('blank_count'),
+                    column_data.argmin(normalized, where=non_empty).name('min_value'),
+                    column_data.argmax(normalized, where=non_empty).name('max_value'),
+                    lengths.min(where=non_empty).name('min_length'),
+                    lengths.max(where=non_empty).name('max_length'),
+                    lengths.mean(where=non_empty).name('avg_length')
+                ])
+            ).execute()
             
-            # Combine all metrics
-            return pd.concat([basic_metrics, non_empty_metrics, length_metrics], axis=1)
+            # Columns without non-blank values report zero lengths
+            length_columns = ['min_length', 'max_length', 'avg_length']
+            metrics[length_columns] = metrics[length_columns].fillna(0)
+            return metrics
             
         elif 'int' in column_type.lower() or 'float' in column_type.lower() or 'decimal' in column_type.lower():
             # Filter out nulls
@@ -264,26 +250,62 @@ def get_column_metrics(connection_name, schema, table, column):
         return None
 
 
+def load_stored_histogram(histogram_path, column):
+    """Load a column's histogram from histograms.parquet in the layout the Histogram tab charts"""
+    histogram_con = connect_ibis_duckdb()
+    histograms = histogram_con.read_parquet(histogram_path)
+    histogram = histograms.filter(histograms.column_name == column).execute()
+    
+    if histogram.empty:
+        st.info("Histogram not available for this column")
+        return None
+    
+    kind = histogram['column_kind'].iloc[0]
+    if kind == 'string':
+        return (
+            pd.DataFrame({'str_length': histogram['bucket'].astype(int), 'count': histogram['count']})
+            .sort_values('str_length')
+            .reset_index(drop=True)
+        )
+    if kind == 'numeric':
+        numeric_histogram = pd.DataFrame({
+            'bin_num': histogram['bucket'].astype(int),
+            'count': histogram['count'],
+            'bin_start': histogram['bin_start'],
+            'bin_end': histogram['bin_end']
+        })
+        # Histograms stored before the histogram engine have no labels
+        if 'label' in histogram.columns:
+            numeric_histogram['label'] = histogram['label']
+        return (
+            numeric_histogram
+            .sort_values('bin_num')
+            .reset_index(drop=True)
+        )
+    return (
+        pd.DataFrame({'date_bucket': pd.to_datetime(histogram['bucket']), 'count': histogram['count']})
+        .sort_values('date_bucket')
+        .reset_index(drop=True)
+    )
+
+@cached_by_profile_version
 def get_column_histogram(connection_name, schema, table, column):
     """Generate histogram data using Ibis"""
     try:
-        # Get data path from catalog
-        catalog_con = ibis.duckdb.connect('profiles.db')
-        catalog_table = catalog_con.table('profile_catalog')
-        
-        data_path = (
-            catalog_table.filter(
-                (catalog_table.connection_name == connection_name) &
-                (catalog_table.schema_name == schema) &
-                (catalog_table.table_name == table)
-            )
-            .data_path
-            .execute()
-            .iloc[0]
-        )
+        # Get data and histogram paths from the catalog index
+        entry = get_catalog_entry(connection_name, schema, table)
+        data_path = entry['data_path']
+        histogram_path = entry.get('histogram_path')
+        
+        # Histograms computed during profiling are read without touching the data
+        if not pd.isna(histogram_path) and Path(histogram_path).exists():
+            return load_stored_histogram(histogram_path, column)
+        
+        if raw_data_unavailable(data_path, "Histogram"):
+            return None
         
         # Read data using Ibis
-        data_con = ibis.duckdb.connect()
+        data_con = connect_ibis_duckdb()
         table_data = data_con.read_parquet(data_path)
         column_data = table_data[column]
         
@@ -305,61 +327,13 @@ def get_column_histogram(connection_name, schema, table, column):
             return histogram
             
         elif any(t in column_type for t in ['int', 'float', 'decimal']):
-            # Get min and max values
-            stats = (
-                table_data.aggregate([
-                    column_data.min().name('min_val'),
-                    column_data.max().name('max_val'),
-                    column_data.count().name('total_count')
-                ])
-            ).execute()
+            # Bounds and bins come from one query; all-null columns have no bins
+            histogram = numeric_histograms(table_data, [column])
+            if histogram.empty:
+                st.info("Histogram not available: the column has no non-null values")
+                return None
             
-            min_val = stats['min_val'].iloc[0]
-            max_val = stats['max_val'].iloc[0]
-            
-            if min_val is not None and max_val is not None:
-                # Create 10 equal-width bins
-                bin_width = (max_val - min_val) / 10
-                
-                # Create bins using case/when
-                bins = []
-                for i in range(10):
-                    bin_start = min_val + (i * bin_width)
-                    bin_end = min_val + ((i + 1) * bin_width)
-                    
-                    condition = (
-                        (column_data >= bin_start) &
-                        (column_data < bin_end if i < 9 else column_data <= bin_end)
-                    )
-                    bins.append(condition)
-                
-                # Create histogram using case/when
-                histogram = (
-                    table_data
-                    .filter(column_data.notnull())
-                    .group_by(
-                        bin_num=ibis.case()
-                        .when(bins[0], 0)
-                        .when(bins[1], 1)
-                        .when(bins[2], 2)
-                        .when(bins[3], 3)
-                        .when(bins[4], 4)
-                        .when(bins[5], 5)
-                        .when(bins[6], 6)
-                        .when(bins[7], 7)
-                        .when(bins[8], 8)
-                        .when(bins[9], 9)
-                        .end()
-                    )
-                    .aggregate(count=lambda t: t.count())
-                    .mutate(
-                        bin_start=min_val + (ibis.literal(bin_width) * ibis._.bin_num),
-                        bin_end=min_val + (ibis.literal(bin_width) * (ibis._.bin_num + 1))
-                    )
-                    .order_by('bin_num')
-                ).execute()
-                
-                return histogram
+            return histogram.drop(columns='column_name')
             
         elif any(t in column_type for t in ['date', 'timestamp']):
             # For date/timestamp, group by the date part
@@ -383,31 +357,39 @@ def get_column_histogram(connection_name, schema, table, column):
 
 
 
+@cached_by_profile_version
 def get_value_patterns(connection_name, schema, table, column):
     """Analyze patterns using Ibis"""
     try:
-        # Get pattern path from catalog
-        catalog_con = ibis.duckdb.connect('profiles.db')
-        catalog_table = catalog_con.table('profile_catalog')
-        
-        pattern_path = (
-            catalog_table.filter(
-                (catalog_table.connection_name == connection_name) &
-                (catalog_table.schema_name == schema) &
-                (catalog_table.table_name == table)
-            )
-            .pattern_path
-            .execute()
-            .iloc[0]
-        )
+        # Get pattern path from the catalog index
+        pattern_path = get_catalog_entry(connection_name, schema, table)['pattern_path']
         
         if pattern_path is None:
             return None
         
         # Read pattern data using Ibis
-        pattern_con = ibis.duckdb.connect()
+        pattern_con = connect_ibis_duckdb()
         pattern_data = pattern_con.read_parquet(pattern_path)
         
+        # Pattern profiles store pattern counts already aggregated per column
+        if {'column_name', 'pattern', 'count'} <= set(pattern_data.columns):
+            pattern_counts = (
+                pattern_data
+                .filter(pattern_data.column_name == column)
+                .group_by(pattern_data.pattern.name(column))
+                .aggregate(count=pattern_data['count'].sum())
+            ).execute()
+            
+            if pattern_counts.empty:
+                return None
+            
+            # Percentages are relative to every stored pattern, not just the ones displayed
+            total_count = pattern_counts['count'].sum()
+            pattern_counts = pattern_counts.sort_values('count', ascending=False).head(100).reset_index(drop=True)
+            pattern_counts['percentage'] = (pattern_counts['count'] * 100.0 / total_count).round(2)
+            
+            return pattern_counts
+        
         # Get patterns for specific column
         if column in pattern_data.columns:
             pattern_counts = (
@@ -429,26 +411,48 @@ def get_value_patterns(connection_name, schema, table, column):
         st.error(f"Error analyzing patterns: {str(e)}")
         return None
 
+@cached_by_profile_version
 def get_value_frequencies(connection_name, schema, table, column):
     """Get value frequencies using Ibis"""
     try:
-        # Get data path from catalog
-        catalog_con = ibis.duckdb.connect('profiles.db')
-        catalog_table = catalog_con.table('profile_catalog')
-        
-        data_path = (
-            catalog_table.filter(
-                (catalog_table.connection_name == connection_name) &
-                (catalog_table.schema_name == schema) &
-                (catalog_table.table_name == table)
-            )
-            .data_path
-            .execute()
-            .iloc[0]
-        )
+        # Get data and top values paths from the catalog index
+        entry = get_catalog_entry(connection_name, schema, table)
+        data_path = entry['data_path']
+        top_values_path = entry.get('top_values_path')
+        
+        # Percentages are relative to every profiled row (the sample for sampled profiles), nulls included
+        profile = get_table_profile(connection_name, schema, table)
+        column_profile = profile[profile['column_name'] == column].iloc[0]
+        total = column_profile['sample_rows']
+        
+        if not pd.isna(top_values_path) and Path(top_values_path).exists():
+            # Heavy hitters stored during profiling; counts are exact unless merged across parts or runs
+            top_values_con = connect_ibis_duckdb()
+            top_values = top_values_con.read_parquet(top_values_path)
+            frequencies = (
+                top_values
+                .filter(top_values.column_name == column)
+                .select('value', 'count', 'error')
+                .order_by(ibis.desc('count'))
+                .limit(100)
+            ).execute()
+            
+            # Nulls are counted separately; sampled summaries store them scaled up to the full table
+            null_count = round(column_profile['null_count'] * column_profile['sample_fraction'])
+            if null_count:
+                frequencies = pd.concat([
+                    frequencies,
+                    pd.DataFrame({'value': [None], 'count': [int(null_count)], 'error': [0]})
+                ], ignore_index=True).sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+            
+            frequencies['percentage'] = (frequencies['count'] * 100.0 / total).round(2) if total else 0.0
+            return frequencies.rename(columns={'error': 'max_error'})
+        
+        if raw_data_unavailable(data_path, "Value frequency analysis"):
+            return None
         
         # Read data using Ibis
-        data_con = ibis.duckdb.connect()
+        data_con = connect_ibis_duckdb()
         table_data = data_con.read_parquet(data_path)
         
         # Create base frequency count
@@ -464,35 +468,56 @@ def get_value_frequencies(connection_name, schema, table, column):
         frequencies = freq_base.execute()
         
         # Calculate percentages
-        total = frequencies['count'].sum()
-        frequencies['percentage'] = (frequencies['count'] * 100.0 / total).round(2)
+        frequencies['percentage'] = (frequencies['count'] * 100.0 / total).round(2) if total else 0.0
         
         return frequencies
     except Exception as e:
         st.error(f"Error getting value frequencies: {str(e)}")
         return None
 
-@st.cache_data
+@cached_by_profile_version
 def get_pattern_matches(connection_name, schema, table, column, pattern):
     """Get values that match a specific pattern"""
     try:
-        # Get data path from catalog
-        catalog_con = ibis.duckdb.connect('profiles.db')
-        catalog_table = catalog_con.table('profile_catalog')
-        
-        data_path = (
-            catalog_table.filter(
-                (catalog_table.connection_name == connection_name) &
-                (catalog_table.schema_name == schema) &
-                (catalog_table.table_name == table)
-            )
-            .data_path
-            .execute()
-            .iloc[0]
-        )
+        # Get data and pattern paths from the catalog index
+        entry = get_catalog_entry(connection_name, schema, table)
+        data_path, pattern_path = entry['data_path'], entry['pattern_path']
+        
+        # Pattern profiles keep the most frequent values of each pattern as exemplars
+        if not pd.isna(pattern_path):
+            pattern_con = connect_ibis_duckdb()
+            pattern_data = pattern_con.read_parquet(pattern_path)
+            
+            if 'exemplars' in pattern_data.columns:
+                pattern_filter = (
+                    pattern_data.pattern.isnull() if pd.isna(pattern)
+                    else pattern_data.pattern == pattern
+                )
+                exemplars = (
+                    pattern_data
+                    .filter((pattern_data.column_name == column) & pattern_filter)
+                    .select('exemplars')
+                    .execute()
+                    .explode('exemplars')
+                    .dropna(subset=['exemplars'])
+                )
+                
+                matches = pd.DataFrame({
+                    column: exemplars['exemplars'].map(lambda exemplar: exemplar['value']),
+                    'count': exemplars['exemplars'].map(lambda exemplar: exemplar['count'])
+                })
+                return (
+                    matches
+                    .groupby(column, dropna=False, as_index=False)['count'].sum()
+                    .sort_values('count', ascending=False)
+                    .reset_index(drop=True)
+                )
+        
+        if raw_data_unavailable(data_path, "Pattern drill-down"):
+            return None
         
         # Read data using Ibis
-        data_con = ibis.duckdb.connect()
+        data_con = connect_ibis_duckdb()
         table_data = data_con.read_parquet(data_path)
         
         # Create pattern expression
@@ -557,6 +582,64 @@ def main():
                 },
                 hide_index=True
             )
+            
+            st.subheader("Profiling Runs")
+            run_options = [
+                (row['connection_name'], row['schema_name'], row['table_name'])
+                for _, row in profiled_tables.iterrows()
+            ]
+            run_table = st.selectbox(
+                "Select Table",
+                options=run_options,
+                format_func=lambda option: f"{option[0]} / {option[1]}.{option[2]}",
+                key="runs_table"
+            )
+            
+            if run_table:
+                runs = get_profile_runs(*run_table)
+                if runs.empty:
+                    st.info("No timings recorded for this table yet.")
+                else:
+                    # Stages of the most recent run
+                    latest_run = runs[runs['run_id'] == runs['run_id'].iloc[0]]
+                    latest_total = latest_run[latest_run['stage'] == 'total'].iloc[0]
+                    st.write(
+                        f"Last run {latest_total['status']} at "
+                        f"{latest_total['run_started_at']:%d/%m/%y %H:%M:%S} "
+                        f"in {latest_total['seconds']:.2f}s"
+                    )
+                    stages = latest_run[latest_run['stage'] != 'total']
+                    st.bar_chart(data=stages.set_index('stage')['seconds'])
+                    st.dataframe(
+                        stages[['stage', 'seconds', 'rows', 'rows_per_second', 'bytes_written', 'peak_rss_mb']],
+                        column_config={
+                            "stage": "Stage",
+                            "seconds": st.column_config.NumberColumn("Seconds", format="%.3f"),
+                            "rows": st.column_config.NumberColumn("Rows", format="%d"),
+                            "rows_per_second": st.column_config.NumberColumn("Rows/s", format="%.0f"),
+                            "bytes_written": st.column_config.NumberColumn("Bytes Written", format="%d"),
+                            "peak_rss_mb": st.column_config.NumberColumn("Peak RSS (MB)", format="%.1f")
+                        },
+                        hide_index=True
+                    )
+                    
+                    # Whole-run totals of recent runs, to spot regressions
+                    st.caption("Recent runs")
+                    st.dataframe(
+                        runs[runs['stage'] == 'total'][
+                            ['run_started_at', 'status', 'seconds', 'rows', 'rows_per_second', 'bytes_written', 'peak_rss_mb']
+                        ],
+                        column_config={
+                            "run_started_at": st.column_config.DatetimeColumn("Started", format="DD/MM/YY HH:mm:ss"),
+                            "status": "Status",
+                            "seconds": st.column_config.NumberColumn("Seconds", format="%.3f"),
+                            "rows": st.column_config.NumberColumn("Rows", format="%d"),
+                            "rows_per_second": st.column_config.NumberColumn("Rows/s", format="%.0f"),
+                            "bytes_written": st.column_config.NumberColumn("Bytes Written", format="%d"),
+                            "peak_rss_mb": st.column_config.NumberColumn("Peak RSS (MB)", format="%.1f")
+                        },
+                        hide_index=True
+                    )
         
         with tab2:
             # First select connection
@@ -606,10 +689,38 @@ def main():
                         with col3:
                             st.metric("Last Profiled", profile['profile_date'].iloc[0].strftime('%Y-%m-%d %H:%M:%S'))
 
+                        is_estimate = bool(profile['is_estimate'].any())
+                        sample_columns = [
+                            'is_estimate', 'unique_count_method', 'sample_method', 'sample_repeatable',
+                            'sample_rows', 'sample_fraction'
+                        ]
+                        sample_columns += [column for column in STORED_METRIC_COLUMNS if column in profile.columns]
+                        if is_estimate:
+                            sample_info = profile.iloc[0]
+                            notes = []
+                            if pd.notna(sample_info['sample_method']):
+                                notes.append(
+                                    f"Estimated from a {sample_info['sample_method']} sample of "
+                                    f"{int(sample_info['sample_rows']):,} rows "
+                                    f"({sample_info['sample_fraction']:.2%} of the table). "
+                                    "Null and unique figures are estimates."
+                                )
+                                if not sample_info['sample_repeatable']:
+                                    notes.append(
+                                        "The database cannot seed its sampling, so the sample is not "
+                                        "reproducible and profiling it again gives different figures."
+                                    )
+                            if (profile['unique_count_method'] == 'hll').any():
+                                notes.append("Unique counts are HyperLogLog estimates.")
+                            notes.append("The ± columns show approximate 95% error bounds in percentage points.")
+                            st.warning(" ".join(notes))
+                        else:
+                            sample_columns += ['null_pct_error', 'unique_pct_error']
+
                         # Display column statistics
                         st.subheader("Column Statistics")
                         st.dataframe(
-                            profile.drop('profile_date', axis=1),
+                            profile.drop(['profile_date'] + sample_columns, axis=1),
                             column_config={
                                 "column_name": "Column",
                                 "row_count": st.column_config.NumberColumn(
@@ -631,6 +742,14 @@ def main():
                                 "unique_percentage": st.column_config.NumberColumn(
                                     "Unique %",
                                     format="%.2f%%"
+                                ),
+                                "null_pct_error": st.column_config.NumberColumn(
+                                    "± Null %",
+                                    format="%.2f"
+                                ),
+                                "unique_pct_error": st.column_config.NumberColumn(
+                                    "± Unique %",
+                                    format="%.2f"
                                 )
                             },
                             hide_index=True
@@ -644,6 +763,9 @@ def main():
                 profile = get_table_profile(selected_connection, schema, table)
                 
                 if not profile.empty:
+                    if profile['sample_method'].notna().any():
+                        st.caption("This table was profiled from a sample; column analyses below describe the sample.")
+                    
                     # Column selector
                     selected_column = st.selectbox(
                         "Select a column to analyze",
@@ -684,10 +806,11 @@ def main():
                                 # For numeric columns
                                 elif 'bin_start' in histogram.columns:
                                     # Create labels for x-axis
-                                    histogram['label'] = histogram.apply(
-                                        lambda row: f"{row['bin_start']:.2f} - {row['bin_end']:.2f}",
-                                        axis=1
-                                    )
+                                    if 'label' not in histogram.columns:
+                                        histogram['label'] = histogram.apply(
+                                            lambda row: f"{row['bin_start']:.2f} - {row['bin_end']:.2f}",
+                                            axis=1
+                                        )
                                     
                                     # Create the chart
                                     chart_data = pd.DataFrame({
@@ -0,0 +1,64 @@
+import threading
+import functools
+import pandas as pd
+from collections import OrderedDict
+from catalog import get_catalog_entry
+
+# Results kept across all cached viewer accessors before the least recently used are evicted
+PROFILE_CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _is_cacheable(result):
+    """Failed or unavailable lookups return None or an empty frame and are retried next time"""
+    if result is None:
+        return False
+    return not (isinstance(result, pd.DataFrame) and result.empty)
+
+def _copy(result):
+    """Hand out copies so callers can add columns without changing the cached frame"""
+    return result.copy() if isinstance(result, (pd.DataFrame, pd.Series)) else result
+
+def clear_profile_cache():
+    """Drop every cached result"""
+    with _cache_lock:
+        _cache.clear()
+
+def cached_by_profile_version(func):
+    """Cache a viewer accessor taking (connection_name, schema, table, ...) per profile version
+
+    Results are keyed by the accessor, its arguments and the table's last_profiled
+    timestamp from the catalog. Re-profiling a table changes the timestamp, so its
+    stale results are never returned and are dropped on the next miss.
+    """
+    @functools.wraps(func)
+    def wrapper(connection_name, schema, table, *args):
+        entry = get_catalog_entry(connection_name, schema, table)
+        if entry is None:
+            return func(connection_name, schema, table, *args)
+
+        version = entry['last_profiled']
+        table_key = (func.__qualname__, connection_name, schema, table)
+        key = table_key + tuple(args)
+        with _cache_lock:
+            cached = _cache.get(key)
+            if cached is not None and cached[0] == version:
+                _cache.move_to_end(key)
+                return _copy(cached[1])
+
+        result = func(connection_name, schema, table, *args)
+        if not _is_cacheable(result):
+            return result
+
+        with _cache_lock:
+            # Results of older profile versions of this table can never be hit again
+            for stale_key in [k for k, (v, _) in _cache.items() if k[1:4] == table_key[1:] and v != version]:
+                del _cache[stale_key]
+            _cache[key] = (version, result)
+            _cache.move_to_end(key)
+            while len(_cache) > PROFILE_CACHE_SIZE:
+                _cache.popitem(last=False)
+        return _copy(result)
+
+    return wrapper
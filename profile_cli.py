@@ -0,0 +1,174 @@
+"""Profile tables of saved connections from the command line, e.g. from cron
+
+    python profile_cli.py warehouse --schema "sales*" --table "fact_*" --parallel 4
+
+Profiles are written to the same data_profiles/ tree and profile_catalog rows as the app.
+"""
+import sys
+import logging
+import argparse
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from histograms import HISTOGRAM_BINS, BINNING_METHODS
+from duckdb_settings import configure_duckdb
+from file_sources import is_file_source
+from profiler import (
+    load_saved_connections, create_connection, generate_profile, list_tables_from_information_schema
+)
+
+logger = logging.getLogger("profile_cli")
+
+class LogProgress:
+    """Progress bar stand-in that logs each new progress message of a table"""
+
+    def __init__(self, name):
+        self.name = name
+        self.last_text = None
+
+    def progress(self, value, text=None):
+        if text and text != self.last_text:
+            self.last_text = text
+            logger.info(f"{self.name}: {text}")
+
+def matches(name, patterns):
+    """Whether a schema or table name matches any of the glob patterns (all names if none given)"""
+    return not patterns or any(fnmatch(name, pattern) for pattern in patterns)
+
+def find_tables(connection, schema_patterns, table_patterns):
+    """List (schema, table) pairs of a connection matching the schema and table globs"""
+    schemas = [schema for schema in connection.list_databases() if matches(schema, schema_patterns)]
+    try:
+        schema_tables = list_tables_from_information_schema(connection, schemas)
+    except Exception:
+        schema_tables = {schema: connection.list_tables(database=schema) for schema in schemas}
+
+    # Backends without schemas list their tables under "default", like the selector page
+    if not any(schema_tables.values()) and matches("default", schema_patterns):
+        schema_tables = {"default": connection.list_tables()}
+
+    return [
+        (schema, table)
+        for schema, tables in sorted(schema_tables.items())
+        for table in tables
+        if matches(table, table_patterns) or matches(f"{schema}.{table}", table_patterns)
+    ]
+
+def profile_table(connection_name, db_type, params, schema, table, profile_options):
+    """Profile one table with its own connection; returns (success, duration)"""
+    connection = create_connection(db_type, params)
+    if connection is None:
+        return None, None
+    # File sources are profiled where they are instead of being copied to parquet
+    if is_file_source(db_type):
+        profile_options = {**profile_options, 'push_down': True}
+    try:
+        return generate_profile(
+            connection=connection,
+            schema=schema,
+            table=table,
+            progress_bar=LogProgress(f"{connection_name}/{schema}.{table}"),
+            connection_name=connection_name,
+            **profile_options
+        )
+    finally:
+        disconnect = getattr(connection, 'disconnect', None)
+        if disconnect:
+            disconnect()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Profile tables of saved connections without the web app.")
+    parser.add_argument("connections", nargs="+", help="Names of saved connections in connections.json")
+    parser.add_argument("--schema", action="append", default=[], metavar="GLOB",
+                        help="Only profile schemas matching this glob (repeatable)")
+    parser.add_argument("--table", action="append", default=[], metavar="GLOB",
+                        help="Only profile tables matching this glob, as 'table' or 'schema.table' (repeatable)")
+    parser.add_argument("--parallel", type=int, default=1, help="Tables to profile in parallel (default 1)")
+    parser.add_argument("--push-down", action="store_true",
+                        help="Profile in the source database without exporting the tables to parquet")
+    parser.add_argument("--sample", choices=["bernoulli", "reservoir"],
+                        help="Profile a sample instead of every row")
+    parser.add_argument("--sample-size", type=float,
+                        help="Fraction of rows for bernoulli samples, number of rows for reservoir samples")
+    parser.add_argument("--sketches", action="store_true",
+                        help="Approximate unique counts with HyperLogLog sketches")
+    parser.add_argument("--watermark-column",
+                        help="Re-profile incrementally using this increasing column")
+    parser.add_argument("--histogram-bins", type=int, default=HISTOGRAM_BINS,
+                        help=f"Bins in numeric histograms (default {HISTOGRAM_BINS})")
+    parser.add_argument("--histogram-method", choices=BINNING_METHODS, default='equal_width',
+                        help="How numeric histogram bins are placed")
+    parser.add_argument("--memory-limit", metavar="SIZE",
+                        help="Memory per DuckDB connection before spilling to disk, e.g. 4GB")
+    parser.add_argument("--threads", type=int, help="Threads per DuckDB connection")
+    parser.add_argument("--temp-directory", metavar="PATH", help="Folder DuckDB spills to")
+    args = parser.parse_args(argv)
+
+    if args.sample and args.sample_size is None:
+        parser.error("--sample requires --sample-size")
+    if args.sample and args.watermark_column:
+        parser.error("--sample cannot be combined with --watermark-column; incremental profiles read every new row")
+    if args.parallel < 1:
+        parser.error("--parallel must be at least 1")
+    return args
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+    configure_duckdb(memory_limit=args.memory_limit, threads=args.threads, temp_directory=args.temp_directory)
+    profile_options = {
+        'push_down': args.push_down,
+        'sample_method': args.sample,
+        'sample_size': args.sample_size,
+        'use_sketches': args.sketches,
+        'watermark_column': args.watermark_column,
+        'histogram_bins': args.histogram_bins,
+        'histogram_method': args.histogram_method
+    }
+
+    saved_connections = load_saved_connections()
+    tasks = []
+    for connection_name in args.connections:
+        if connection_name not in saved_connections:
+            logger.error(f"No saved connection named '{connection_name}'")
+            return 1
+        db_type = saved_connections[connection_name]["type"]
+        params = saved_connections[connection_name]["params"]
+
+        connection = create_connection(db_type, params)
+        if connection is None:
+            return 1
+        try:
+            tables = find_tables(connection, args.schema, args.table)
+        finally:
+            disconnect = getattr(connection, 'disconnect', None)
+            if disconnect:
+                disconnect()
+
+        logger.info(f"{connection_name}: {len(tables)} table(s) to profile")
+        tasks.extend((connection_name, db_type, params, schema, table) for schema, table in tables)
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+        futures = {
+            executor.submit(profile_table, *task, profile_options): task
+            for task in tasks
+        }
+        for future in as_completed(futures):
+            connection_name, _, _, schema, table = futures[future]
+            try:
+                success, duration = future.result()
+            except Exception as e:
+                logger.error(f"Error profiling {schema}.{table}: {str(e)}")
+                success, duration = None, None
+
+            if success:
+                logger.info(f"Successfully profiled {connection_name}/{schema}.{table} in {duration}")
+            else:
+                logger.error(f"Failed to profile {connection_name}/{schema}.{table}")
+                failures += 1
+
+    logger.info(f"Profiled {len(tasks) - failures} of {len(tasks)} table(s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
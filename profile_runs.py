@@ -0,0 +1,125 @@
+import sys
+import time
+import uuid
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Iterable, Optional
+from catalog import catalog_connection
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process in MB, or None where the platform does not report it"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def file_bytes(paths: Iterable) -> int:
+    """Total size of the files that exist among paths"""
+    return sum(Path(path).stat().st_size for path in paths if Path(path).exists())
+
+class StageTimer:
+    """Accumulates time, rows and bytes written per profiling stage
+
+    A stage can be entered several times (once per exported part, for example) and
+    its measurements add up. Peak RSS is the process high-water mark when the stage
+    last finished, so it includes memory used by earlier stages and concurrent profiles.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    def _record(self, name):
+        return self.stages.setdefault(name, {'seconds': 0.0, 'rows': 0, 'bytes_written': 0, 'peak_rss_mb': None})
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, seconds=time.perf_counter() - start)
+
+    def add(self, name, seconds=0.0, rows=0, bytes_written=0):
+        record = self._record(name)
+        record['seconds'] += seconds
+        record['rows'] += rows
+        record['bytes_written'] += bytes_written
+        record['peak_rss_mb'] = peak_rss_mb()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+def ensure_runs_table(catalog_db):
+    """Create the table of per-stage profiling measurements if needed"""
+    catalog_db.execute("""
+        CREATE TABLE IF NOT EXISTS profile_runs (
+            run_id VARCHAR,
+            connection_name VARCHAR,
+            schema_name VARCHAR,
+            table_name VARCHAR,
+            run_started_at TIMESTAMP,
+            status VARCHAR,
+            stage VARCHAR,
+            seconds DOUBLE,
+            rows BIGINT,
+            rows_per_second DOUBLE,
+            bytes_written BIGINT,
+            peak_rss_mb DOUBLE
+        )
+    """)
+
+def record_profile_run(connection_name, schema, table, timer: StageTimer, status, row_count=0) -> str:
+    """Store one row per stage of a profiling run plus a 'total' row for the whole run"""
+    run_id = uuid.uuid4().hex
+    stages = dict(timer.stages)
+    stages['total'] = {
+        'seconds': timer.elapsed(),
+        'rows': row_count,
+        'bytes_written': sum(stage['bytes_written'] for stage in timer.stages.values()),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+    rows = [
+        [
+            run_id, connection_name, schema, table, timer.started_at, status, stage,
+            measures['seconds'],
+            measures['rows'],
+            measures['rows'] / measures['seconds'] if measures['rows'] and measures['seconds'] else None,
+            measures['bytes_written'],
+            measures['peak_rss_mb']
+        ]
+        for stage, measures in stages.items()
+    ]
+    with catalog_connection() as catalog_db:
+        ensure_runs_table(catalog_db)
+        catalog_db.executemany("INSERT INTO profile_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return run_id
+
+def get_profile_runs(connection_name=None, schema=None, table=None, limit=20) -> pd.DataFrame:
+    """Stage measurements of the most recent runs, optionally for a single table"""
+    filters, params = [], []
+    for column, value in (('connection_name', connection_name), ('schema_name', schema), ('table_name', table)):
+        if value is not None:
+            filters.append(f"{column} = ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+    with catalog_connection() as catalog_db:
+        ensure_runs_table(catalog_db)
+        return catalog_db.execute(f"""
+            SELECT * FROM profile_runs
+            WHERE run_id IN (
+                SELECT run_id FROM profile_runs {where}
+                GROUP BY run_id
+                ORDER BY max(run_started_at) DESC
+                LIMIT ?
+            )
+            ORDER BY run_started_at DESC, stage
+        """, [*params, limit]).df()
@@ -0,0 +1,1178 @@
+import ibis
+import ibis.selectors as s
+import json
+import time
+import queue
+import logging
+import threading
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime
+from typing import Dict, Any, Optional
+from sketches import (
+    hll_registers, hll_register_expr, hll_estimate, hll_merge, hll_relative_error, save_sketches, load_sketches,
+    top_k_values, merge_top_k
+)
+from histograms import numeric_histograms, HISTOGRAM_BINS
+from catalog import get_catalog_entry, update_catalog
+from profile_runs import StageTimer, file_bytes, record_profile_run
+from duckdb_settings import connect_ibis_duckdb
+from file_sources import is_file_source, connect_file_source
+
+logger = logging.getLogger(__name__)
+
+def log_message(level, message):
+    """Default notifier: report profiling messages through logging"""
+    logger.log(logging.getLevelName(level.upper()), message)
+
+def load_saved_connections():
+    """Load saved connections from a JSON file"""
+    config_path = Path("connections.json")
+    if config_path.exists():
+        with open(config_path, "r") as f:
+            return json.load(f)
+    return {}
+
+def create_connection(db_type: str, params: Dict[str, Any], notify=log_message) -> Optional[ibis.BaseBackend]:
+    """Create database connection using Ibis"""
+    try:
+        # File sources are views over the files, read in place
+        if is_file_source(db_type):
+            return connect_file_source(params)
+        
+        # DuckDB databases get the shared memory, thread and spill settings
+        if db_type.lower() == "duckdb":
+            params = dict(params)
+            return connect_ibis_duckdb(params.pop("path", ":memory:"), **params)
+        
+        connection_method = getattr(ibis, db_type.lower())
+        
+        # For databases that only need a path parameter, pass the path string directly
+        if len(params) == 1 and "path" in params:
+            return connection_method.connect(params["path"])
+            
+        return connection_method.connect(**params)
+    except Exception as e:
+        notify('error', f"Connection error: {str(e)}")
+        return None
+
+def list_tables_from_information_schema(connection, schemas):
+    """List the tables of every schema with a single information_schema query"""
+    tables = connection.sql(
+        "SELECT table_schema AS table_schema, table_name AS table_name FROM information_schema.tables"
+    ).execute()
+    
+    schema_tables = {}
+    wanted = set(schemas)
+    for schema, table in tables[['table_schema', 'table_name']].itertuples(index=False):
+        if schema in wanted:
+            schema_tables.setdefault(schema, set()).add(table)
+    return {schema: sorted(tables) for schema, tables in schema_tables.items()}
+
+# Upper bound on the compiled SQL of one fused profiling query; wider tables are split into batches
+MAX_PROFILE_SQL_LENGTH = 1_000_000
+
+# z-score of the approximate 95% error bounds reported for sampled profiles
+SAMPLE_CONFIDENCE_Z = 1.96
+
+# Seed passed to TABLESAMPLE so every profiling query sees the same sample
+SAMPLE_SEED = 42
+
+# Type-specific metrics stored in the summary next to the null and unique counts
+METRIC_NAMES = [
+    'min_value', 'max_value', 'mean', 'std_dev', 'median',
+    'blank_count', 'min_key', 'max_key', 'min_length', 'max_length', 'avg_length'
+]
+
+def column_kind(dtype):
+    """Classify a column type into the family of metrics profiled for it"""
+    if dtype.is_string():
+        return 'string'
+    if dtype.is_numeric():
+        return 'numeric'
+    if dtype.is_temporal():
+        return 'temporal'
+    return 'other'
+
+def normalized_string(column):
+    """Normalize strings for min/max comparison: trimmed, upper-cased and without punctuation"""
+    return column.strip().upper().re_replace(r'[^\w\s]', '')
+
+# Whether a backend compiles a metric for a column type, keyed by (backend, metric, type)
+_metric_support = {}
+
+def backend_name(table):
+    """Name of the backend a table expression runs on; None for unbound tables"""
+    try:
+        return table._find_backend().name
+    except Exception:
+        return None
+
+def metric_supported(table, metric, dtype, expr):
+    """Whether the table's backend can compile a metric for columns of a type, checked once per backend
+    
+    Not every backend has a rule for every operation, e.g. MSSQL and MySQL have no
+    approximate median or regex replace, and Oracle no argmin/argmax.
+    """
+    backend = backend_name(table)
+    key = (backend, metric, str(dtype))
+    if key not in _metric_support:
+        try:
+            ibis.to_sql(table.aggregate([expr.name(metric)]), dialect=backend)
+            _metric_support[key] = True
+        except Exception:
+            _metric_support[key] = False
+    return _metric_support[key]
+
+def column_aggregates(table, col, idx, exact_unique=True):
+    """Aggregate expressions computed for a single column in the fused profiling query
+    
+    Type-specific metrics the backend cannot compile are left out.
+    """
+    column = table[col]
+    metrics = [column.isnull().sum().name(f'null_count_{idx}')]
+    if exact_unique:
+        metrics.append(column.nunique().name(f'unique_count_{idx}'))
+    
+    kind = column_kind(column.type())
+    if kind == 'numeric':
+        type_metrics = {
+            'min_value': column.min(),
+            'max_value': column.max(),
+            # Decimal columns would otherwise give Decimal values that parquet can't mix with floats
+            'mean': column.mean().cast('float64'),
+            'std_dev': column.std().cast('float64'),
+            'median': column.approx_median().cast('float64')
+        }
+    elif kind == 'temporal':
+        type_metrics = {
+            'min_value': column.min(),
+            'max_value': column.max()
+        }
+    elif kind == 'string':
+        # Min/max and lengths ignore blank strings; the original value is kept for the normalized extremes
+        non_empty = column.notnull() & (column.strip() != '')
+        normalized = normalized_string(column)
+        lengths = column.length()
+        type_metrics = {
+            'blank_count': (column.notnull() & (column.strip() == '')).cast('int64').sum(),
+            'min_value': column.argmin(normalized, where=non_empty),
+            'max_value': column.argmax(normalized, where=non_empty),
+            'min_key': normalized.min(where=non_empty),
+            'max_key': normalized.max(where=non_empty),
+            'min_length': lengths.min(where=non_empty),
+            'max_length': lengths.max(where=non_empty),
+            'avg_length': lengths.mean(where=non_empty)
+        }
+    else:
+        type_metrics = {}
+    
+    metrics += [
+        expr.name(f'{metric}_{idx}')
+        for metric, expr in type_metrics.items()
+        if metric_supported(table, metric, column.type(), expr)
+    ]
+    return metrics
+
+def stringify_metric(value):
+    """Store min/max values as strings so columns of every type share one summary column"""
+    return None if value is None or pd.isna(value) else str(value)
+
+def summary_column_stats(summary_row, kind):
+    """Turn a stored summary row back into column statistics that can be merged"""
+    stats = {'null_count': int(summary_row['null_count'])}
+    for metric in METRIC_NAMES:
+        value = summary_row.get(metric)
+        stats[metric] = None if value is None or pd.isna(value) else value
+    
+    # Min/max are stored as strings; restore their type so they compare correctly
+    for bound in ('min_value', 'max_value'):
+        if stats[bound] is not None and kind == 'numeric':
+            stats[bound] = pd.to_numeric(stats[bound])
+        elif stats[bound] is not None and kind == 'temporal':
+            stats[bound] = pd.Timestamp(stats[bound])
+    if kind == 'string':
+        stats['blank_count'] = int(stats['blank_count'] or 0)
+    return stats
+
+def merge_column_stats(kind, first, first_rows, second, second_rows):
+    """Combine the statistics of one column computed over two disjoint sets of rows
+    
+    Counts add up, min/max keep the overall extremes and mean/std are pooled.
+    Medians cannot be combined from the medians of each side, so the merged median
+    is None until column_medians recomputes it over all rows.
+    """
+    if first is None:
+        return dict(second)
+    
+    merged = {'null_count': first['null_count'] + second['null_count']}
+    first_values = first_rows - first['null_count']
+    second_values = second_rows - second['null_count']
+    
+    def pick(first_value, second_value, choose):
+        values = [value for value in (first_value, second_value) if value is not None and not pd.isna(value)]
+        return choose(values) if values else None
+    
+    def weighted(first_value, first_weight, second_value, second_weight):
+        if first_value is None or pd.isna(first_value) or not first_weight:
+            return second_value
+        if second_value is None or pd.isna(second_value) or not second_weight:
+            return first_value
+        return (first_value * first_weight + second_value * second_weight) / (first_weight + second_weight)
+    
+    if kind in ('numeric', 'temporal'):
+        merged['min_value'] = pick(first.get('min_value'), second.get('min_value'), min)
+        merged['max_value'] = pick(first.get('max_value'), second.get('max_value'), max)
+    
+    if kind == 'numeric':
+        merged['mean'] = weighted(first.get('mean'), first_values, second.get('mean'), second_values)
+        merged['median'] = None
+        
+        # Pool the sums of squared deviations of both sides
+        values = first_values + second_values
+        if values > 1 and merged['mean'] is not None:
+            squares = 0.0
+            for side, count in ((first, first_values), (second, second_values)):
+                if count and side.get('mean') is not None and not pd.isna(side.get('mean')):
+                    std_dev = side.get('std_dev')
+                    if std_dev is not None and not pd.isna(std_dev):
+                        squares += std_dev ** 2 * (count - 1)
+                    squares += count * (side['mean'] - merged['mean']) ** 2
+            merged['std_dev'] = (squares / (values - 1)) ** 0.5
+        else:
+            merged['std_dev'] = None
+    
+    elif kind == 'string':
+        merged['blank_count'] = first['blank_count'] + second['blank_count']
+        for bound, choose in (('min', min), ('max', max)):
+            key = pick(first.get(f'{bound}_key'), second.get(f'{bound}_key'), choose)
+            side = first if key is not None and first.get(f'{bound}_key') == key else second
+            merged[f'{bound}_key'] = key
+            merged[f'{bound}_value'] = side.get(f'{bound}_value') if key is not None else None
+        merged['min_length'] = pick(first.get('min_length'), second.get('min_length'), min)
+        merged['max_length'] = pick(first.get('max_length'), second.get('max_length'), max)
+        merged['avg_length'] = weighted(
+            first.get('avg_length'), first_values - first['blank_count'],
+            second.get('avg_length'), second_values - second['blank_count']
+        )
+    
+    return merged
+
+def column_medians(table, columns):
+    """Approximate medians of numeric columns in one scan; None where the backend has no median"""
+    medians = {
+        col: table[col].approx_median().cast('float64')
+        for col in columns
+    }
+    supported = [
+        col for col in columns
+        if metric_supported(table, 'median', table[col].type(), medians[col])
+    ]
+    results = table.aggregate([
+        medians[col].name(f'median_{idx}') for idx, col in enumerate(columns) if col in supported
+    ]).execute().iloc[0] if supported else {}
+    return {
+        col: None if col not in supported or pd.isna(results[f'median_{idx}']) else results[f'median_{idx}']
+        for idx, col in enumerate(columns)
+    }
+
+def batch_aggregate(table, columns, batch, include_row_count=False, count_singletons=False, exact_unique=True):
+    """Build the fused aggregate expression for a batch of column indexes"""
+    if count_singletons:
+        # Flag values that occur exactly once; used to extrapolate distinct counts from a sample
+        table = table.mutate(**{
+            f'__singleton_{idx}': table[columns[idx]].count().over(
+                ibis.window(group_by=table[columns[idx]])
+            ) == 1
+            for idx in batch
+        })
+    
+    metrics = [
+        metric
+        for idx in batch
+        for metric in column_aggregates(table, columns[idx], idx, exact_unique)
+    ]
+    if count_singletons:
+        metrics.extend(
+            table[f'__singleton_{idx}'].cast('int64').sum().name(f'singleton_count_{idx}')
+            for idx in batch
+        )
+    if include_row_count:
+        metrics.append(table.count().name('row_count'))
+    
+    return table.aggregate(metrics)
+
+def plan_column_batches(table, columns, max_sql_length=MAX_PROFILE_SQL_LENGTH, count_singletons=False):
+    """Split column indexes into batches whose fused aggregate SQL stays below max_sql_length"""
+    pending = [list(range(len(columns)))] if columns else []
+    batches = []
+    
+    while pending:
+        batch = pending.pop(0)
+        sql = ibis.to_sql(batch_aggregate(table, columns, batch, True, count_singletons))
+        
+        if len(sql) <= max_sql_length or len(batch) == 1:
+            batches.append(batch)
+        else:
+            # Halve oversized batches until each one compiles to a manageable query
+            middle = len(batch) // 2
+            pending[:0] = [batch[:middle], batch[middle:]]
+    
+    return batches
+
+def count_value(value):
+    """Integer count from an aggregate result; sums over an empty table come back NULL"""
+    return int(value) if pd.notna(value) else 0
+
+def profile_column_batch(table, columns, batch, include_row_count=False, count_singletons=False, exact_unique=True):
+    """Compute null/unique counts and type-specific metrics for a batch of columns in a single scan
+    
+    Returns the stats keyed by column name and the table's row count, which is None
+    unless include_row_count is set.
+    """
+    results = batch_aggregate(
+        table, columns, batch, include_row_count, count_singletons, exact_unique
+    ).execute().iloc[0]
+    
+    stats = {
+        columns[idx]: {'null_count': count_value(results[f'null_count_{idx}'])}
+        for idx in batch
+    }
+    for idx in batch:
+        for metric in METRIC_NAMES:
+            if f'{metric}_{idx}' in results.index:
+                value = results[f'{metric}_{idx}']
+                stats[columns[idx]][metric] = None if pd.isna(value) else value
+        if 'blank_count' in stats[columns[idx]]:
+            stats[columns[idx]]['blank_count'] = count_value(stats[columns[idx]]['blank_count'])
+    if exact_unique:
+        for idx in batch:
+            stats[columns[idx]]['unique_count'] = count_value(results[f'unique_count_{idx}'])
+    if count_singletons:
+        for idx in batch:
+            stats[columns[idx]]['singleton_count'] = count_value(results[f'singleton_count_{idx}'])
+    row_count = count_value(results['row_count']) if include_row_count else None
+    return stats, row_count
+
+def row_sample(table_obj, fraction):
+    """Bernoulli sample of a table, seeded where the backend supports repeatable sampling
+    
+    Returns the sample and whether it is repeatable. Backends such as MSSQL and
+    MySQL sample with RAND() and cannot take a seed.
+    """
+    seeded = table_obj.sample(fraction, method='row', seed=SAMPLE_SEED)
+    try:
+        ibis.to_sql(seeded, dialect=backend_name(table_obj))
+        return seeded, True
+    except Exception:
+        return table_obj.sample(fraction, method='row'), False
+
+def sample_table(connection, table_obj, sample_method, sample_size, total_rows):
+    """Sample a table using the backend's TABLESAMPLE where available
+    
+    Bernoulli samples take sample_size as a fraction of rows, reservoir samples
+    take it as a fixed number of rows. Returns the sample and whether it is
+    repeatable; an unseeded sample differs between the queries that read it.
+    """
+    if sample_method == 'bernoulli':
+        return row_sample(table_obj, sample_size)
+    
+    if sample_method == 'reservoir':
+        sample_rows = int(sample_size)
+        if sample_rows >= total_rows:
+            return table_obj, True
+        if connection.name == 'duckdb':
+            return connection.sql(
+                f"SELECT * FROM ({ibis.to_sql(table_obj)}) AS source "
+                f"USING SAMPLE reservoir({sample_rows} ROWS) REPEATABLE ({SAMPLE_SEED})"
+            ), True
+        # Oversample slightly with Bernoulli sampling, then cap at the requested size
+        sample, repeatable = row_sample(table_obj, min(1.0, sample_rows * 1.1 / total_rows))
+        return sample.limit(sample_rows), repeatable
+    
+    raise ValueError(f"Unknown sample method: {sample_method}")
+
+def estimate_from_sample(stats, sample_rows, total_rows):
+    """Scale sampled null and unique counts up to the full table
+    
+    Null counts use the sample proportion with a finite-population binomial error.
+    Unique counts use the GEE estimator (values seen once stand for sqrt(N/n)
+    distinct values); its error bound spans the observed distinct count up to
+    every singleton being N/n distinct values.
+    """
+    if sample_rows == 0 or total_rows == 0:
+        return {'null_count': 0, 'unique_count': 0, 'null_pct_error': 0.0, 'unique_pct_error': 0.0}
+    
+    scale = total_rows / sample_rows
+    correction = max(0.0, 1 - sample_rows / total_rows)
+    
+    null_fraction = stats['null_count'] / sample_rows
+    null_error = SAMPLE_CONFIDENCE_Z * (null_fraction * (1 - null_fraction) / sample_rows * correction) ** 0.5
+    
+    distinct = stats['unique_count']
+    singletons = stats['singleton_count']
+    unique_estimate = min(total_rows, (distinct - singletons) + singletons * scale ** 0.5)
+    unique_upper = min(total_rows, (distinct - singletons) + singletons * scale)
+    unique_error = max(unique_estimate - distinct, unique_upper - unique_estimate) / total_rows
+    
+    return {
+        'null_count': int(round(null_fraction * total_rows)),
+        'unique_count': int(round(unique_estimate)),
+        'null_pct_error': round(null_error * 100.0, 4),
+        'unique_pct_error': round(unique_error * 100.0, 4)
+    }
+    
+def pattern_expression(column):
+    """Mask a column's values into character-class patterns"""
+    return (
+        column
+        .cast('string')
+        # Replace lowercase letters with lowercase a
+        .re_replace(r'[a-z]', 'a')
+        # Replace uppercase letters with uppercase A
+        .re_replace(r'[A-Z]', 'A')
+        # Replace numbers with N
+        .re_replace(r'[0-9]', 'N')
+    )
+
+# Most frequent values kept as exemplars for each pattern
+PATTERN_EXEMPLARS = 10
+
+# Patterns kept per column; free-text columns can otherwise have as many patterns as values
+MAX_PATTERNS_PER_COLUMN = 1000
+
+def aggregate_patterns(table, pattern_columns):
+    """Compute pattern counts with exemplar values for string columns in one scan
+    
+    Returns one row per (column_name, pattern) with the pattern's row count and its
+    most frequent values as a list of {'value', 'count'} exemplars.
+    """
+    values = (
+        table
+        .select(pattern_columns)
+        .pivot_longer(s.all(), names_to='column_name', values_to='value')
+    )
+    value_counts = (
+        values
+        .group_by([values.column_name, pattern_expression(values.value).name('pattern'), values.value])
+        .aggregate(count=lambda t: t.count())
+    )
+    
+    pattern_window = ibis.window(group_by=[value_counts.column_name, value_counts.pattern])
+    ranked = value_counts.mutate(
+        pattern_count=value_counts['count'].sum().over(pattern_window),
+        exemplar_rank=ibis.row_number().over(
+            ibis.window(
+                group_by=[value_counts.column_name, value_counts.pattern],
+                order_by=ibis.desc(value_counts['count'])
+            )
+        )
+    )
+    ranked = ranked.mutate(
+        pattern_rank=ibis.dense_rank().over(
+            ibis.window(group_by=ranked.column_name, order_by=ibis.desc(ranked.pattern_count))
+        )
+    )
+    exemplar_rows = (
+        ranked
+        .filter((ranked.exemplar_rank < PATTERN_EXEMPLARS) & (ranked.pattern_rank < MAX_PATTERNS_PER_COLUMN))
+        .select('column_name', 'pattern', 'pattern_count', 'value', 'count')
+    ).execute()
+    
+    return collect_exemplars(exemplar_rows, 'pattern_count')
+
+def collect_exemplars(exemplar_rows, count_column):
+    """Fold (column_name, pattern, value, count) rows into one row per pattern with top exemplars"""
+    if exemplar_rows.empty:
+        return pd.DataFrame(columns=['column_name', 'pattern', 'count', 'exemplars'])
+    
+    exemplar_rows = exemplar_rows.sort_values('count', ascending=False)
+    patterns = []
+    for (column_name, pattern), group in exemplar_rows.groupby(['column_name', 'pattern'], dropna=False, sort=False):
+        patterns.append({
+            'column_name': column_name,
+            'pattern': None if pd.isna(pattern) else pattern,
+            'count': int(group[count_column].iloc[0]),
+            'exemplars': [
+                {'value': None if pd.isna(value) else value, 'count': int(count)}
+                for value, count in group[['value', 'count']].head(PATTERN_EXEMPLARS).itertuples(index=False)
+            ]
+        })
+    return pd.DataFrame(patterns)
+
+def merge_pattern_profiles(pattern_frames):
+    """Combine pattern aggregates from several parts or runs into one row per column pattern"""
+    pattern_frames = [frame for frame in pattern_frames if not frame.empty]
+    if not pattern_frames:
+        return pd.DataFrame(columns=['column_name', 'pattern', 'count', 'exemplars'])
+    patterns = pd.concat(pattern_frames, ignore_index=True)
+    
+    pattern_counts = (
+        patterns
+        .groupby(['column_name', 'pattern'], dropna=False, as_index=False)['count'].sum()
+        .rename(columns={'count': 'pattern_count'})
+    )
+    exemplar_rows = patterns[['column_name', 'pattern', 'exemplars']].explode('exemplars').dropna(subset=['exemplars'])
+    exemplar_rows = pd.DataFrame({
+        'column_name': exemplar_rows['column_name'],
+        'pattern': exemplar_rows['pattern'],
+        'value': exemplar_rows['exemplars'].map(lambda exemplar: exemplar['value']),
+        'count': exemplar_rows['exemplars'].map(lambda exemplar: exemplar['count'])
+    })
+    exemplar_rows = (
+        exemplar_rows
+        .groupby(['column_name', 'pattern', 'value'], dropna=False, as_index=False)['count'].sum()
+        .merge(pattern_counts, on=['column_name', 'pattern'], how='left')
+    )
+    
+    # Keep the same per-column pattern limit as a single scan
+    merged = collect_exemplars(exemplar_rows, 'pattern_count')
+    return (
+        merged
+        .sort_values('count', ascending=False)
+        .groupby('column_name', sort=False)
+        .head(MAX_PATTERNS_PER_COLUMN)
+        .reset_index(drop=True)
+    )
+
+def aggregate_histograms(table, column_kinds, bins=HISTOGRAM_BINS, method='equal_width'):
+    """Compute the histograms of every column
+    
+    Strings are bucketed by length and dates/timestamps by day in one scan; numeric
+    columns go through the numeric histogram engine in a second one. Returns one
+    row per (column_name, bucket) with bin_start/bin_end set for numeric bins.
+    """
+    buckets = {}
+    for col, kind in column_kinds.items():
+        column = table[col]
+        if kind == 'string':
+            buckets[col] = column.length().cast('string')
+        elif kind == 'temporal' and not column.type().is_time():
+            buckets[col] = column.cast('date').cast('string')
+    
+    histograms = []
+    if buckets:
+        # Bucket keys are strings so every column fits in one unpivoted column
+        keys = {f'b{i}': col for i, col in enumerate(buckets)}
+        values = (
+            table
+            .select(**{key: buckets[col] for key, col in keys.items()})
+            .pivot_longer(s.all(), names_to='column_key', values_to='bucket')
+        )
+        counts = (
+            values
+            .filter(values.bucket.notnull())
+            .group_by([values.column_key, values.bucket])
+            .aggregate(count=lambda t: t.count())
+        ).execute()
+        histograms.append(pd.DataFrame({
+            'column_name': counts['column_key'].map(keys),
+            'column_kind': counts['column_key'].map(keys).map(column_kinds),
+            'bucket': counts['bucket'],
+            'bin_start': None,
+            'bin_end': None,
+            'count': counts['count'],
+            'label': counts['bucket']
+        }))
+    
+    numeric_columns = [col for col, kind in column_kinds.items() if kind == 'numeric']
+    if numeric_columns:
+        bins_df = numeric_histograms(table, numeric_columns, bins, method)
+        histograms.append(pd.DataFrame({
+            'column_name': bins_df['column_name'],
+            'column_kind': 'numeric',
+            'bucket': bins_df['bin_num'].astype(str),
+            'bin_start': bins_df['bin_start'],
+            'bin_end': bins_df['bin_end'],
+            'count': bins_df['count'],
+            'label': bins_df['label']
+        }))
+    
+    histograms = [histogram for histogram in histograms if not histogram.empty]
+    if not histograms:
+        return pd.DataFrame(columns=['column_name', 'column_kind', 'bucket', 'bin_start', 'bin_end', 'count', 'label'])
+    return pd.concat(histograms, ignore_index=True)
+
+def watermark_to_string(value):
+    """Serialize a watermark value for the catalog"""
+    return None if pd.isna(value) else str(value)
+
+def get_source_state(table_obj, watermark_column, previous_watermark=None):
+    """Row count and watermark of the source table, plus the rows past a previous watermark"""
+    watermark = table_obj[watermark_column]
+    metrics = [
+        table_obj.count().name('row_count'),
+        watermark.max().name('watermark')
+    ]
+    if previous_watermark is not None:
+        metrics.append(
+            (watermark > ibis.literal(previous_watermark).cast(watermark.type()))
+            .cast('int64').sum().name('new_rows')
+        )
+    
+    state = table_obj.aggregate(metrics).execute().iloc[0]
+    return {
+        'row_count': int(state['row_count']),
+        'watermark': watermark_to_string(state['watermark']),
+        'new_rows': int(state['new_rows']) if 'new_rows' in state and pd.notna(state['new_rows']) else 0
+    }
+
+def can_merge_incrementally(previous, source_state, columns, watermark_column, push_down,
+                            summary_path, sketch_path, pattern_path, top_values_path):
+    """Check whether new rows can be merged into the stored profile instead of re-profiling
+    
+    Merging assumes rows are only appended: the previous row count plus the rows
+    past the stored watermark must add up to the current row count.
+    """
+    if (
+        previous is None
+        or previous['watermark_column'] != watermark_column
+        or previous['watermark_value'] is None
+        or previous['row_count'] is None
+        or (previous['data_path'] is None) != push_down
+        or not summary_path.exists()
+        or not sketch_path.exists()
+        or not top_values_path.exists()
+    ):
+        return False
+    
+    if previous['row_count'] + source_state['new_rows'] != source_state['row_count']:
+        return False
+    
+    # Only aggregated pattern profiles can be merged with the new rows' patterns
+    if previous['pattern_path'] is not None and (
+        previous['pattern_path'] != str(pattern_path)
+        or 'exemplars' not in pq.read_schema(previous['pattern_path']).names
+    ):
+        return False
+    
+    previous_summary = pd.read_parquet(summary_path)
+    if 'sample_method' in previous_summary.columns and previous_summary['sample_method'].notna().any():
+        return False
+    return set(previous_summary['column_name']) == set(columns)
+
+# Rows fetched from the backend per Arrow record batch during export
+EXPORT_BATCH_ROWS = 100_000
+
+# Rows written to each parquet part before the export rolls over to a new file
+EXPORT_PART_ROWS = 1_000_000
+
+def export_parts(table_expr, table_dir, prefix, part_queue, stop=None):
+    """Stream a table into numbered parquet parts, queueing each part once it is complete
+    
+    Record batches are written as they arrive, so memory stays bounded by the batch
+    size. The queue receives part paths, an exception if the export fails, and
+    finally None. Setting the stop event ends the export after the current batch.
+    """
+    writer = None
+    part_rows = 0
+    part_index = 0
+    try:
+        reader = table_expr.to_pyarrow_batches(chunk_size=EXPORT_BATCH_ROWS)
+        for batch in reader:
+            if stop is not None and stop.is_set():
+                return
+            if writer is None:
+                part_path = table_dir / f"{prefix}-{part_index:05d}.parquet"
+                writer = pq.ParquetWriter(str(part_path), reader.schema)
+            writer.write_batch(batch)
+            part_rows += batch.num_rows
+            
+            if part_rows >= EXPORT_PART_ROWS:
+                writer.close()
+                writer = None
+                part_queue.put(part_path)
+                part_rows = 0
+                part_index += 1
+        
+        if writer is not None:
+            writer.close()
+            writer = None
+            part_queue.put(part_path)
+        elif part_index == 0:
+            # Empty tables still get one part so the schema is preserved
+            part_path = table_dir / f"{prefix}-{part_index:05d}.parquet"
+            pq.write_table(pa.Table.from_batches([], schema=reader.schema), str(part_path))
+            part_queue.put(part_path)
+    except Exception as e:
+        part_queue.put(e)
+    finally:
+        if writer is not None:
+            writer.close()
+        part_queue.put(None)
+
+def record_run(connection_name, schema, table, timer, status, row_count, notify=log_message):
+    """Store the stage measurements of a run; a failure here never fails the profile itself"""
+    try:
+        record_profile_run(connection_name, schema, table, timer, status, row_count=row_count)
+    except Exception as e:
+        notify('warning', f"Could not record profiling timings of {schema}.{table}: {str(e)}")
+
+def generate_profile(connection, schema, table, progress_bar, connection_name, push_down=False,
+                     sample_method=None, sample_size=None, use_sketches=False, watermark_column=None,
+                     histogram_bins=HISTOGRAM_BINS, histogram_method='equal_width', notify=log_message,
+                     on_stage=None, reuse_export=False):
+    """Generate profile for a table using Ibis compiled SQL
+    
+    With push_down the profiling queries run on the source backend and only their
+    aggregated results are stored; the raw table is not exported to parquet.
+    With sample_method ('bernoulli' or 'reservoir') only a sample is profiled and
+    null/unique counts are stored as estimates with approximate error bounds.
+    With use_sketches unique counts come from HyperLogLog sketches, which are
+    saved to sketches.parquet so later runs or partitions can be merged.
+    With watermark_column the table is re-profiled incrementally: unchanged tables
+    are skipped and only rows past the stored watermark are profiled and merged.
+    Numeric histograms use histogram_bins bins placed by histogram_method
+    ('equal_width', 'quantile' or 'log').
+    
+    progress_bar only needs a progress(value, text) method and notify(level, message)
+    receives info, warning and error messages. on_stage(stage) is called as the
+    'exported', 'summarized' and 'cataloged' stages complete; with reuse_export the
+    data parts of an export that completed earlier are profiled instead of exporting
+    the table again.
+    
+    Time, rows, bytes written and peak memory of every stage are recorded in the
+    profile_runs table.
+    """
+    timer = StageTimer()
+    exporter = None
+    stop_export = threading.Event()
+    try:
+        table_start_time = datetime.now()
+        
+        # Get table reference
+        if schema and schema != "default":
+            table_obj = connection.table(table, database=schema)
+        else:
+            table_obj = connection.table(table)
+        
+        # Create directory structure
+        base_dir = Path("data_profiles")
+        conn_dir = base_dir / connection_name
+        schema_dir = conn_dir / schema
+        table_dir = schema_dir / table
+        table_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Define paths
+        summary_path = table_dir / "summary.parquet"
+        pattern_path = table_dir / "patterns.parquet"
+        sketch_path = table_dir / "sketches.parquet"
+        histogram_path = table_dir / "histograms.parquet"
+        top_values_path = table_dir / "top_values.parquet"
+        
+        # Get column names
+        columns = table_obj.columns
+        total_columns = len(columns)
+        column_kinds = {col: column_kind(table_obj[col].type()) for col in columns}
+        
+        # Compare row count and watermark with the previous run
+        previous = None
+        source_state = None
+        if watermark_column and watermark_column not in columns:
+            notify('info', f"{schema}.{table} has no column '{watermark_column}', running a full profile")
+            watermark_column = None
+        if watermark_column:
+            progress_bar.progress(0.1, "Checking for changes...")
+            previous = get_catalog_entry(connection_name, schema, table)
+            previous_watermark = previous['watermark_value'] if previous else None
+            with timer.stage('change_check'):
+                source_state = get_source_state(table_obj, watermark_column, previous_watermark)
+            
+            if (
+                previous is not None
+                and previous['watermark_column'] == watermark_column
+                and previous['row_count'] == source_state['row_count']
+                and previous_watermark == source_state['watermark']
+            ):
+                duration = datetime.now() - table_start_time
+                progress_bar.progress(1.0, f"Unchanged since last profile, skipped. Time taken: {duration}")
+                record_run(connection_name, schema, table, timer, 'skipped', source_state['row_count'], notify)
+                return True, duration
+            
+            if not can_merge_incrementally(previous, source_state, columns, watermark_column,
+                                           push_down, summary_path, sketch_path, pattern_path,
+                                           top_values_path):
+                previous = None
+            
+            # Incremental profiles read every new row and merge unique counts through
+            # HyperLogLog sketches, so those counts are estimates and sampling does not apply
+            if sample_method:
+                notify('warning', f"{schema}.{table} is profiled incrementally on '{watermark_column}', "
+                                  f"so every new row is read and the {sample_method} sample is not used")
+            sample_method = None
+            use_sketches = True
+        
+        incremental = previous is not None
+        reuse_export = reuse_export and not incremental
+        if incremental:
+            # New rows land in their own parts next to the previously profiled data
+            part_stamp = datetime.now().strftime('%Y%m%d%H%M%S%f')
+            data_prefix = f"data_{part_stamp}"
+            source_table = table_obj.filter(
+                table_obj[watermark_column] >
+                ibis.literal(previous['watermark_value']).cast(table_obj[watermark_column].type())
+            )
+        else:
+            data_prefix = "data"
+            source_table = table_obj
+            
+            # A resumed profile keeps the parts of its completed export
+            reuse_export = reuse_export and not push_down and any(table_dir.glob(f"{data_prefix}-*.parquet"))
+            stale_files = [*table_dir.glob("patterns*.parquet")]
+            if not reuse_export:
+                stale_files += table_dir.glob("data*.parquet")
+            
+            # A full profile replaces the data and pattern files of earlier runs
+            for part in stale_files:
+                part.unlink()
+            sketch_path.unlink(missing_ok=True)
+            histogram_path.unlink(missing_ok=True)
+            top_values_path.unlink(missing_ok=True)
+        
+        if sample_method:
+            progress_bar.progress(0.1, f"Sampling {table}...")
+            with timer.stage('sampling'):
+                source_rows = int(table_obj.count().execute())
+                source_table, sample_repeatable = sample_table(
+                    connection, table_obj, sample_method, sample_size, source_rows
+                )
+            if not sample_repeatable:
+                notify('warning', f"{connection.name} cannot seed its sampling, so the sample of "
+                                  f"{schema}.{table} is not reproducible")
+        else:
+            sample_repeatable = True
+        sampled = bool(sample_method)
+        
+        # Sample estimates need exact sample distinct counts, so sketches only apply to full profiles
+        use_sketches = use_sketches and not sampled and bool(columns)
+        if use_sketches:
+            # Check every column on the table the sketches run on: the source when pushing
+            # down, otherwise the exported parts read by the local DuckDB connection
+            if push_down:
+                sketch_table, sketch_dialect = source_table, None
+            else:
+                sketch_table, sketch_dialect = ibis.table(source_table.schema(), name=table), 'duckdb'
+            try:
+                ibis.to_sql(hll_register_expr(sketch_table, columns), dialect=sketch_dialect)
+            except Exception as e:
+                notify('warning', f"HyperLogLog sketches are not supported for {schema}.{table}, using exact unique counts: {str(e)}")
+                use_sketches = False
+        
+        # Find string columns to generate patterns for
+        pattern_columns = [
+            col for col in columns
+            if 'string' in str(table_obj[col].type()).lower()
+        ]
+        has_pattern_file = incremental and previous['pattern_path'] is not None
+        pattern_frames = [pd.read_parquet(str(pattern_path))] if has_pattern_file else []
+        top_value_frames = [pd.read_parquet(str(top_values_path))] if incremental else []
+        
+        total_rows = 0
+        column_stats = {}
+        sketches = {}
+        profile_table = None
+        per_part_stats = False
+        
+        if push_down:
+            # Profile the source table in place
+            profile_table = source_table
+            
+            progress_bar.progress(0.4, "Finding most frequent values...")
+            try:
+                with timer.stage('top_values'):
+                    top_value_frames.append(top_k_values(profile_table, columns))
+            except Exception as e:
+                notify('warning', f"Skipping value frequencies for {schema}.{table}: {str(e)}")
+                top_value_frames = []
+            
+            # Generate patterns table if there are string columns
+            if pattern_columns:
+                progress_bar.progress(0.5, "Generating patterns...")
+                try:
+                    with timer.stage('patterns'):
+                        pattern_frames.append(aggregate_patterns(profile_table, pattern_columns))
+                    has_pattern_file = True
+                except Exception as e:
+                    # Not every backend supports regex replacement
+                    notify('warning', f"Skipping patterns for {schema}.{table}: {str(e)}")
+        else:
+            # Stream the table into parquet parts on a background thread and profile each
+            # part as soon as it is written. Null counts and sketches merge across parts;
+            # exact unique counts and sample estimates need one pass over all parts.
+            per_part_stats = use_sketches
+            part_queue = queue.Queue()
+            if reuse_export:
+                # The export already completed; queue its parts as if they were just written
+                exporter = None
+                for part_path in sorted(table_dir.glob(f"{data_prefix}-*.parquet")):
+                    part_queue.put(part_path)
+                part_queue.put(None)
+                progress_bar.progress(0.2, f"Resuming {table} from its exported parts...")
+            else:
+                exporter = threading.Thread(
+                    target=export_parts,
+                    args=(source_table, table_dir, data_prefix, part_queue, stop_export),
+                    daemon=True
+                )
+                progress_bar.progress(0.2, f"Exporting {table} to parquet...")
+                export_start = time.perf_counter()
+                exporter.start()
+            
+            # Private connection, so concurrent profiles don't share one DuckDB connection across threads
+            local_con = connect_ibis_duckdb()
+            exported_rows = 0
+            exported_parts = 0
+            part_paths = []
+            column_batches = None
+            
+            while True:
+                part_path = part_queue.get()
+                if part_path is None:
+                    break
+                if isinstance(part_path, Exception):
+                    raise part_path
+                
+                part_table = local_con.read_parquet(str(part_path))
+                exported_parts += 1
+                part_paths.append(part_path)
+                
+                if pattern_columns:
+                    with timer.stage('patterns'):
+                        pattern_frames.append(aggregate_patterns(part_table, pattern_columns))
+                    has_pattern_file = True
+                with timer.stage('top_values'):
+                    top_value_frames.append(top_k_values(part_table, columns))
+                
+                if per_part_stats:
+                    part_start = time.perf_counter()
+                    if column_batches is None:
+                        column_batches = plan_column_batches(part_table, columns)
+                    part_rows = 0
+                    for i, batch in enumerate(column_batches):
+                        batch_stats, batch_rows = profile_column_batch(
+                            part_table, columns, batch,
+                            include_row_count=(i == 0),
+                            exact_unique=False
+                        )
+                        if batch_rows is not None:
+                            part_rows = batch_rows
+                        for col, stats in batch_stats.items():
+                            column_stats[col] = merge_column_stats(
+                                column_kinds[col], column_stats.get(col), total_rows, stats, part_rows
+                            )
+                        for col, registers in hll_registers(part_table, [columns[idx] for idx in batch]).items():
+                            sketches[col] = hll_merge([sketches[col], registers]) if col in sketches else registers
+                    timer.add('column_metrics', seconds=time.perf_counter() - part_start, rows=part_rows)
+                    total_rows += part_rows
+                    exported_rows = total_rows
+                else:
+                    exported_rows += pq.ParquetFile(str(part_path)).metadata.num_rows
+                
+                progress_bar.progress(
+                    0.4,
+                    f"Exported and profiled {exported_rows:,} rows in {exported_parts} part(s)..."
+                )
+            
+            if exporter is not None:
+                exporter.join()
+                # Export runs alongside the per-part stages, so its time overlaps theirs
+                timer.add(
+                    'export',
+                    seconds=time.perf_counter() - export_start,
+                    rows=exported_rows,
+                    bytes_written=file_bytes(part_paths)
+                )
+            if on_stage:
+                on_stage('exported')
+            
+            if per_part_stats:
+                for col in columns:
+                    column_stats[col]['unique_count'] = min(hll_estimate(sketches[col]), total_rows)
+            else:
+                profile_table = local_con.read_parquet(str(table_dir / f"{data_prefix}-*.parquet"))
+        
+        if has_pattern_file:
+            progress_bar.progress(0.5, "Saving patterns...")
+            with timer.stage('patterns'):
+                merge_pattern_profiles(pattern_frames).to_parquet(str(pattern_path))
+            timer.add('patterns', bytes_written=file_bytes([pattern_path]))
+        
+        # Heavy hitters merge across parts and runs with error bounds on each count
+        if top_value_frames:
+            with timer.stage('top_values'):
+                merge_top_k(top_value_frames).to_parquet(str(top_values_path))
+            timer.add('top_values', bytes_written=file_bytes([top_values_path]))
+        
+        metrics_start = time.perf_counter()
+        if profile_table is not None:
+            # Compute null/unique counts for every column in as few scans as possible
+            column_batches = plan_column_batches(profile_table, columns, count_singletons=sampled)
+            for i, batch in enumerate(column_batches):
+                progress = 0.6 + (0.3 * (i / len(column_batches)))
+                progress_bar.progress(progress, f"Analyzing columns {batch[0] + 1}-{batch[-1] + 1} of {total_columns}")
+                
+                batch_stats, batch_rows = profile_column_batch(
+                    profile_table, columns, batch,
+                    include_row_count=(i == 0),
+                    count_singletons=sampled,
+                    exact_unique=not use_sketches
+                )
+                if batch_rows is not None:
+                    total_rows = batch_rows
+                
+                if use_sketches:
+                    batch_sketches = hll_registers(profile_table, [columns[idx] for idx in batch])
+                    for col, registers in batch_sketches.items():
+                        batch_stats[col]['unique_count'] = min(hll_estimate(registers), total_rows)
+                    sketches.update(batch_sketches)
+                
+                column_stats.update(batch_stats)
+        
+        # Rows analyzed per part were already counted with their part
+        metrics_rows = 0 if per_part_stats else total_rows
+        
+        if incremental:
+            # Merge the new rows' statistics into the stored profile
+            previous_summary = pd.read_parquet(summary_path).set_index('column_name')
+            previous_sketches = load_sketches(str(sketch_path))
+            previous_rows = int(previous['row_count'])
+            for col in columns:
+                sketches[col] = hll_merge([previous_sketches[col], sketches[col]])
+                column_stats[col] = merge_column_stats(
+                    column_kinds[col],
+                    summary_column_stats(previous_summary.loc[col], column_kinds[col]),
+                    previous_rows,
+                    column_stats[col],
+                    total_rows
+                )
+                column_stats[col]['unique_count'] = min(hll_estimate(sketches[col]), previous_rows + total_rows)
+            total_rows += previous_rows
+        
+        if use_sketches:
+            save_sketches(sketches, str(sketch_path))
+        timer.add(
+            'column_metrics',
+            seconds=time.perf_counter() - metrics_start,
+            rows=metrics_rows,
+            bytes_written=file_bytes([sketch_path]) if use_sketches else 0
+        )
+        
+        # Histograms cover every profiled row, including rows merged from earlier runs
+        progress_bar.progress(0.85, "Computing histograms...")
+        with timer.stage('histograms'):
+            if push_down:
+                histogram_table = table_obj if incremental else source_table
+            else:
+                histogram_table = local_con.read_parquet(str(table_dir / "data*.parquet"))
+            try:
+                aggregate_histograms(
+                    histogram_table, column_kinds, histogram_bins, histogram_method
+                ).to_parquet(str(histogram_path))
+                has_histograms = True
+            except Exception as e:
+                notify('warning', f"Skipping histograms for {schema}.{table}: {str(e)}")
+                histogram_path.unlink(missing_ok=True)
+                has_histograms = False
+        if has_histograms:
+            timer.add('histograms', bytes_written=file_bytes([histogram_path]))
+        
+        # Medians merged from parts or earlier runs are recomputed over every row
+        numeric_columns = [col for col in columns if column_kinds[col] == 'numeric']
+        if (per_part_stats or incremental) and numeric_columns:
+            with timer.stage('column_metrics'):
+                try:
+                    for col, median in column_medians(histogram_table, numeric_columns).items():
+                        column_stats[col]['median'] = median
+                except Exception as e:
+                    notify('warning', f"Skipping medians for {schema}.{table}: {str(e)}")
+        
+        sample_rows = total_rows
+        if sampled:
+            total_rows = source_rows
+        
+        summary_data = []
+        for col in columns:
+            if sampled:
+                estimates = estimate_from_sample(column_stats[col], sample_rows, total_rows)
+            elif use_sketches:
+                unique_fraction = column_stats[col]['unique_count'] / total_rows if total_rows else 0.0
+                estimates = {
+                    **column_stats[col],
+                    'null_pct_error': 0.0,
+                    'unique_pct_error': round(SAMPLE_CONFIDENCE_Z * hll_relative_error() * unique_fraction * 100.0, 4)
+                }
+            else:
+                estimates = {**column_stats[col], 'null_pct_error': 0.0, 'unique_pct_error': 0.0}
+            
+            summary_data.append({
+                'column_name': col,
+                'row_count': int(total_rows),
+                'null_count': estimates['null_count'],
+                'unique_count': estimates['unique_count'],
+                'schema_name': schema,
+                'table_name': table,
+                'profile_date': datetime.now(),
+                'connection_name': connection_name,
+                'has_patterns': has_pattern_file and col in pattern_columns,
+                'is_estimate': sampled or use_sketches,
+                'unique_count_method': 'hll' if use_sketches else 'exact',
+                'sample_method': sample_method,
+                'sample_repeatable': sample_repeatable,
+                'sample_rows': int(sample_rows),
+                'sample_fraction': sample_rows / total_rows if total_rows else 1.0,
+                'null_pct_error': estimates['null_pct_error'],
+                'unique_pct_error': estimates['unique_pct_error'],
+                'column_kind': column_kinds[col],
+                **{
+                    metric: stringify_metric(column_stats[col].get(metric))
+                    if metric in ('min_value', 'max_value') else column_stats[col].get(metric)
+                    for metric in METRIC_NAMES
+                }
+            })
+        
+        progress_bar.progress(0.9, "Saving results...")
+        # Save summary
+        with timer.stage('summary'):
+            summary_df = pd.DataFrame(summary_data)
+            summary_df.to_parquet(str(summary_path))
+        timer.add('summary', bytes_written=file_bytes([summary_path]))
+        if on_stage:
+            on_stage('summarized')
+        
+        # Data is read back through a glob over all of its parts
+        with timer.stage('catalog_write'):
+            update_catalog(
+                connection_name,
+                schema,
+                table,
+                None if push_down else str(table_dir / "data*.parquet"),
+                str(summary_path),
+                str(pattern_path) if has_pattern_file else None,
+                row_count=int(total_rows),
+                watermark_column=watermark_column,
+                watermark_value=source_state['watermark'] if source_state else None,
+                histogram_path=str(histogram_path) if has_histograms else None,
+                top_values_path=str(top_values_path) if top_value_frames else None
+            )
+        if on_stage:
+            on_stage('cataloged')
+        
+        # Complete the progress
+        table_end_time = datetime.now()
+        duration = table_end_time - table_start_time
+        record_run(connection_name, schema, table, timer, 'completed', int(total_rows), notify)
+        progress_bar.progress(1.0, f"Complete! Time taken: {duration}")
+        
+        return True, duration
+    
+    except Exception as e:
+        notify('error', f"Error profiling {schema}.{table}: {str(e)}")
+        record_run(connection_name, schema, table, timer, 'failed', 0, notify)
+        return None, None
+    finally:
+        # The export queries the source connection, so it never outlives the profile
+        if exporter is not None and exporter.is_alive():
+            stop_export.set()
+            exporter.join()
@@ -0,0 +1,188 @@
+import math
+import ibis
+import ibis.selectors as s
+import pandas as pd
+from typing import Dict, List, Iterable
+
+# 2^12 registers per column gives a relative standard error of about 1.6%
+HLL_PRECISION = 12
+
+# Bits of the hash used for registers and ranks; the backend's hash is read as a signed
+# BIGINT, so its sign bit is dropped
+HASH_BITS = 63
+
+# Most frequent values kept per column in the heavy-hitters summary
+TOP_K = 100
+
+def hll_relative_error(precision: int = HLL_PRECISION) -> float:
+    """Relative standard error of a HyperLogLog sketch with 2^precision registers"""
+    return 1.04 / math.sqrt(1 << precision)
+
+def hll_register_expr(table, columns: List[str], precision: int = HLL_PRECISION):
+    """Build the expression computing HyperLogLog registers for several columns in one scan
+
+    Every column is hashed, the hashes are unpivoted into (column_key, hash_value)
+    rows and the maximum rank per (column_key, bucket) is aggregated.
+    """
+    m = 1 << precision
+    word_bits = HASH_BITS - precision
+
+    hashed = table.select(**{
+        f'h{i}': ibis.ifelse(table[col].notnull(), table[col].hash(), ibis.null().cast('int64'))
+        for i, col in enumerate(columns)
+    })
+    hashes = hashed.pivot_longer(s.all(), names_to='column_key', values_to='hash_value')
+    hashes = hashes.filter(hashes.hash_value.notnull())
+
+    # Low bits pick the register; the remaining bits below the sign bit form the word
+    hashes = hashes.mutate(
+        bucket=hashes.hash_value & (m - 1),
+        word=(hashes.hash_value >> precision) & ((1 << word_bits) - 1)
+    )
+    # The rank is the position of the leading one bit of the word: one more than its
+    # leading zeros, counted with integer comparisons so no rounding can shift it
+    rank = 1 + sum(
+        (hashes.word < (1 << bit)).cast('int8') for bit in range(word_bits)
+    )
+
+    return (
+        hashes
+        .group_by([hashes.column_key, hashes.bucket])
+        .aggregate(rank=rank.max())
+    )
+
+def hll_registers(table, columns: List[str], precision: int = HLL_PRECISION) -> Dict[str, bytes]:
+    """Compute HyperLogLog registers for the given columns, keyed by column name"""
+    m = 1 << precision
+    registers = {col: bytearray(m) for col in columns}
+
+    results = hll_register_expr(table, columns, precision).execute()
+    for column_key, bucket, rank in results[['column_key', 'bucket', 'rank']].itertuples(index=False):
+        registers[columns[int(column_key[1:])]][int(bucket)] = int(rank)
+
+    return {col: bytes(values) for col, values in registers.items()}
+
+def hll_estimate(registers: bytes) -> int:
+    """Estimate the distinct count represented by a HyperLogLog register array"""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw_estimate = alpha * m * m / sum(2.0 ** -rank for rank in registers)
+
+    # Linear counting is more accurate while many registers are still empty
+    empty_registers = registers.count(0)
+    if raw_estimate <= 2.5 * m and empty_registers:
+        return int(round(m * math.log(m / empty_registers)))
+    return int(round(raw_estimate))
+
+def hll_merge(sketches: Iterable[bytes]) -> bytes:
+    """Merge HyperLogLog register arrays built over different rows of the same column"""
+    sketches = list(sketches)
+    if len({len(registers) for registers in sketches}) > 1:
+        raise ValueError("Cannot merge HyperLogLog sketches with different precisions")
+    return bytes(max(ranks) for ranks in zip(*sketches))
+
+def save_sketches(sketches: Dict[str, bytes], path: str) -> None:
+    """Save per-column sketches to a parquet file"""
+    pd.DataFrame({
+        'column_name': list(sketches.keys()),
+        'precision': [int(math.log2(len(registers))) for registers in sketches.values()],
+        'registers': list(sketches.values())
+    }).to_parquet(path)
+
+def load_sketches(path: str) -> Dict[str, bytes]:
+    """Load per-column sketches saved by save_sketches"""
+    sketches_df = pd.read_parquet(path)
+    return dict(zip(sketches_df['column_name'], sketches_df['registers']))
+
+def merge_sketch_files(paths: Iterable[str]) -> Dict[str, bytes]:
+    """Merge the sketches of several profiles (partitions or runs) column by column"""
+    merged = {}
+    for path in paths:
+        for col, registers in load_sketches(path).items():
+            merged[col] = hll_merge([merged[col], registers]) if col in merged else registers
+    return merged
+
+def top_k_values(table, columns: List[str], k: int = TOP_K) -> pd.DataFrame:
+    """Compute the k most frequent non-null values of several columns in one scan
+
+    Returns one row per (column_name, value) with its count and an error of 0, plus
+    max_unlisted_count: the count of the most frequent value that was not kept.
+    """
+    if not columns:
+        return pd.DataFrame(columns=['column_name', 'value', 'count', 'error', 'max_unlisted_count'])
+
+    values = (
+        table
+        .select(**{f'v{i}': table[col].cast('string') for i, col in enumerate(columns)})
+        .pivot_longer(s.all(), names_to='column_key', values_to='value')
+    )
+    value_counts = (
+        values
+        .filter(values.value.notnull())
+        .group_by([values.column_key, values.value])
+        .aggregate(count=lambda t: t.count())
+    )
+    ranked = value_counts.mutate(
+        value_rank=ibis.row_number().over(
+            ibis.window(group_by=value_counts.column_key, order_by=ibis.desc(value_counts['count']))
+        )
+    )
+    # One value past the top k tells how large the unlisted counts can be
+    top_rows = ranked.filter(ranked.value_rank <= k).execute()
+
+    frames = []
+    for i, col in enumerate(columns):
+        rows = top_rows[top_rows['column_key'] == f'v{i}'].sort_values('value_rank')
+        frames.append(pd.DataFrame({
+            'column_name': col,
+            'value': rows['value'].head(k).tolist(),
+            'count': rows['count'].head(k).astype('int64').tolist(),
+            'error': 0,
+            'max_unlisted_count': int(rows['count'].iloc[k]) if len(rows) > k else 0
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def merge_top_k(summaries: Iterable[pd.DataFrame], k: int = TOP_K) -> pd.DataFrame:
+    """Merge heavy-hitter summaries built over different rows, Misra-Gries style
+
+    Counts of a value add up across summaries. Where a summary did not list the value,
+    its count there is unknown but at most that summary's max_unlisted_count, which is
+    added to the value's error. Only the k largest counts are kept, so count is a lower
+    bound and count + error an upper bound on the true frequency.
+    """
+    summaries = [summary for summary in summaries if not summary.empty]
+    if not summaries:
+        return pd.DataFrame(columns=['column_name', 'value', 'count', 'error', 'max_unlisted_count'])
+
+    merged = []
+    all_rows = pd.concat(summaries, ignore_index=True)
+    for column_name in pd.unique(all_rows['column_name']):
+        parts = [summary[summary['column_name'] == column_name] for summary in summaries]
+        parts = [
+            (dict(zip(part['value'], zip(part['count'], part['error']))), int(part['max_unlisted_count'].iloc[0]))
+            for part in parts if not part.empty
+        ]
+
+        totals = {}
+        for value in set().union(*(listed for listed, _ in parts)):
+            count = error = 0
+            for listed, unlisted in parts:
+                part_count, part_error = listed.get(value, (0, unlisted))
+                count += int(part_count)
+                error += int(part_error)
+            totals[value] = (count, error)
+
+        ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+        max_unlisted = max(
+            [sum(unlisted for _, unlisted in parts)] +
+            [count + error for _, (count, error) in ranked[k:]]
+        )
+        merged.append(pd.DataFrame({
+            'column_name': column_name,
+            'value': [value for value, _ in ranked[:k]],
+            'count': [count for _, (count, _) in ranked[:k]],
+            'error': [error for _, (_, error) in ranked[:k]],
+            'max_unlisted_count': max_unlisted
+        }))
+
+    return pd.concat(merged, ignore_index=True)
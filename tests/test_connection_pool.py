@@ -0,0 +1,52 @@
+import threading
+import time
+import ibis
+import connection_pool
+from connection_pool import get_pooled_connection, hold_pooled_connection, evict_idle_connections
+
+def connect(db_type, params):
+    return ibis.duckdb.connect()
+
+def test_held_connection_is_used_by_one_thread_at_a_time():
+    backend = get_pooled_connection('held', 'DuckDB', {}, connect)
+    active = []
+    overlaps = []
+
+    def query():
+        with hold_pooled_connection('held'):
+            active.append(threading.get_ident())
+            overlaps.append(len(active) > 1)
+            backend.sql('SELECT count(*) AS n FROM range(1000000)').execute()
+            time.sleep(0.05)
+            active.remove(threading.get_ident())
+
+    threads = [threading.Thread(target=query) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == [False] * 4
+    connection_pool.evict_connection('held')
+
+def test_held_connection_is_not_evicted():
+    backend = get_pooled_connection('busy', 'DuckDB', {}, connect)
+    holding = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with hold_pooled_connection('busy'):
+            holding.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    holding.wait()
+    evict_idle_connections(max_idle=-1)
+    assert get_pooled_connection('busy', 'DuckDB', {}, connect) is backend
+    release.set()
+    holder.join()
+
+    evict_idle_connections(max_idle=-1)
+    assert get_pooled_connection('busy', 'DuckDB', {}, connect) is not backend
+    connection_pool.evict_connection('busy')
@@ -0,0 +1,63 @@
+import shutil
+import duckdb
+from flatfile_import import import_csv, import_csv_files
+
+def write_orders(path, amounts):
+    path.write_text("id,amount\n" + "".join(f"{i},{amount}\n" for i, amount in enumerate(amounts)))
+
+def test_malformed_partition_joins_its_dataset(tmp_path):
+    drops = tmp_path / "drops"
+    drops.mkdir()
+    database = str(tmp_path / "flatfiles.db")
+    write_orders(drops / "orders_2026-10-01.csv", range(100))
+    write_orders(drops / "orders_2026-10-02.csv", range(100, 200))
+    write_orders(drops / "orders_2026-10-03.csv", [*range(200, 250), 'n/a', *range(251, 300)])
+
+    result = import_csv_files(str(drops / "*.csv"), database=database)
+
+    assert [(group['table_name'], group['files'], group['rows'], group['rejected_rows'])
+            for group in result['groups']] == [('orders', 3, 299, 1)]
+    with duckdb.connect(database) as conn:
+        assert conn.execute("SELECT typeof(amount) FROM orders LIMIT 1").fetchone()[0] == 'BIGINT'
+        assert conn.execute("SELECT count(*) FROM orders_rejects").fetchone()[0] == 1
+
+    # A later drop with a bad value is appended to the existing table
+    write_orders(drops / "orders_2026-10-04.csv", ['oops', *range(300, 310)])
+    result = import_csv_files(str(drops / "*.csv"), database=database)
+    assert [(group['table_name'], group['rows'], group['rejected_rows'])
+            for group in result['groups']] == [('orders', 10, 1)]
+
+def test_duplicate_files_are_recorded(tmp_path):
+    drops = tmp_path / "drops"
+    drops.mkdir()
+    database = str(tmp_path / "flatfiles.db")
+    write_orders(drops / "orders_2026-10-01.csv", range(100))
+    shutil.copy(drops / "orders_2026-10-01.csv", drops / "orders_2026-10-01_resent.csv")
+
+    result = import_csv_files(str(drops / "*.csv"), database=database)
+
+    assert len(result['skipped']) == 1
+    with duckdb.connect(database) as conn:
+        logged = conn.execute("SELECT file_path, table_name FROM imported_files ORDER BY file_path").fetchall()
+    assert [(path.split('/')[-1], table) for path, table in logged] == [
+        ('orders_2026-10-01.csv', 'orders'), ('orders_2026-10-01_resent.csv', 'orders')
+    ]
+
+    result = import_csv_files(str(drops / "*.csv"), database=database)
+    assert len(result['skipped']) == 2
+    assert result['groups'] == []
+
+def test_rejected_rows_count_rows_not_errors(tmp_path):
+    drops = tmp_path / "drops"
+    drops.mkdir()
+    # Both columns of the last row are bad, giving two reject errors for one row
+    for day in range(1, 4):
+        rows = [f"{day}{i},{i * 2}" for i in range(100)] + (["x,y"] if day == 3 else [])
+        (drops / f"pairs_2026-10-0{day}.csv").write_text("a,b\n" + "\n".join(rows) + "\n")
+
+    single = import_csv(str(drops / "pairs_2026-10-03.csv"), "pairs", ",", '"', True,
+                        column_types={'a': 'BIGINT', 'b': 'BIGINT'}, database=str(tmp_path / "single.db"))
+    assert (single['rows'], single['rejected_rows']) == (100, 1)
+
+    result = import_csv_files(str(drops / "*.csv"), database=str(tmp_path / "bulk.db"))
+    assert [(group['rows'], group['rejected_rows']) for group in result['groups']] == [(300, 1)]
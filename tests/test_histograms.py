@@ -0,0 +1,39 @@
+import ibis
+import pytest
+from histograms import numeric_histograms, NON_FINITE_BIN
+
+@pytest.fixture
+def table():
+    con = ibis.duckdb.connect()
+    return con.sql("""
+        SELECT
+            CASE WHEN i % 10 = 0 THEN 'nan'::DOUBLE
+                 WHEN i % 10 = 1 THEN 'inf'::DOUBLE
+                 WHEN i % 10 = 2 THEN '-inf'::DOUBLE
+                 ELSE i::DOUBLE END AS mixed,
+            42.0 AS constant,
+            CASE WHEN i < 90 THEN 1 ELSE i % 3 + 2 END AS skewed
+        FROM range(100) AS r(i)
+    """)
+
+@pytest.mark.parametrize('method', ['equal_width', 'quantile', 'log'])
+def test_non_finite_values_get_their_own_bin(table, method):
+    histogram = numeric_histograms(table, ['mixed'], bins=5, method=method)
+
+    non_finite = histogram[histogram['bin_num'] == NON_FINITE_BIN]
+    assert non_finite['count'].tolist() == [30]
+    regular = histogram[histogram['bin_num'] >= 0]
+    assert regular['count'].sum() == 70
+    assert regular['bin_start'].min() == 3.0
+    assert regular['bin_end'].max() == 99.0
+
+def test_quantile_bins_never_overlap(table):
+    histogram = numeric_histograms(table, ['constant', 'skewed'], bins=10, method='quantile')
+
+    constant = histogram[histogram['column_name'] == 'constant']
+    assert constant[['bin_num', 'bin_start', 'bin_end', 'count']].values.tolist() == [[0, 42.0, 42.0, 100]]
+
+    skewed = histogram[histogram['column_name'] == 'skewed'].sort_values('bin_num')
+    assert skewed['bin_num'].tolist() == list(range(len(skewed)))
+    assert skewed['count'].sum() == 100
+    assert (skewed['bin_start'].iloc[1:].values > skewed['bin_end'].iloc[:-1].values).all()
@@ -0,0 +1,50 @@
+import sys
+import json
+import subprocess
+from pathlib import Path
+import duckdb
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Keeps profiles.db open read-write, as another process writing the catalog does
+HOLD_CATALOG = """
+import sys, time, duckdb
+con = duckdb.connect('profiles.db')
+con.execute('CREATE TABLE IF NOT EXISTS held (x INTEGER)')
+print('locked', flush=True)
+time.sleep(float(sys.argv[1]))
+con.close()
+"""
+
+def test_cli_profiles_while_another_process_holds_the_catalog(tmp_path):
+    source = duckdb.connect(str(tmp_path / "source.duckdb"))
+    source.execute("CREATE TABLE orders AS SELECT range AS id, 'c' || (range % 7) AS customer FROM range(1000)")
+    source.close()
+    (tmp_path / "connections.json").write_text(json.dumps({
+        "source": {"type": "duckdb", "params": {"path": str(tmp_path / "source.duckdb")}}
+    }))
+
+    holder = subprocess.Popen(
+        [sys.executable, "-c", HOLD_CATALOG, "8"], cwd=tmp_path, stdout=subprocess.PIPE, text=True
+    )
+    try:
+        assert holder.stdout.readline().strip() == 'locked'
+        result = subprocess.run(
+            [sys.executable, str(REPO_ROOT / "profile_cli.py"), "source"],
+            cwd=tmp_path, capture_output=True, text=True, timeout=180
+        )
+    finally:
+        holder.wait(timeout=30)
+
+    assert result.returncode == 0, result.stderr
+    assert "locked by another process" in result.stderr
+    assert "Profiled 1 of 1 table(s)" in result.stderr
+
+    catalog = duckdb.connect(str(tmp_path / "profiles.db"), read_only=True)
+    try:
+        rows = catalog.execute(
+            "SELECT row_count FROM profile_catalog WHERE connection_name = 'source' AND table_name = 'orders'"
+        ).fetchall()
+    finally:
+        catalog.close()
+    assert rows == [(1000,)]
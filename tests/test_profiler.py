@@ -0,0 +1,81 @@
+import ibis
+from types import SimpleNamespace
+from profiler import profile_column_batch
+
+def test_column_named_row_count_keeps_its_stats():
+    con = ibis.duckdb.connect()
+    table = con.sql("""
+        SELECT range AS id, CAST(NULL AS INTEGER) AS row_count, CAST(range * 1.5 AS DECIMAL(10, 1)) AS amount
+        FROM range(100)
+    """)
+    stats, row_count = profile_column_batch(table, table.columns, [0, 1, 2], include_row_count=True)
+
+    assert row_count == 100
+    assert set(stats) == {'id', 'row_count', 'amount'}
+    assert stats['row_count']['null_count'] == 100
+    assert stats['id']['unique_count'] == 100
+    assert isinstance(stats['amount']['mean'], float)
+
+def test_metrics_the_backend_cannot_compile_are_skipped(monkeypatch):
+    import profiler
+    con = ibis.duckdb.connect()
+    table = con.sql("SELECT range AS id, CAST(range AS VARCHAR) AS code FROM range(10)")
+    assert profiler.backend_name(table) == 'duckdb'
+
+    # MSSQL has no approximate median, regex replace or argmin/argmax
+    monkeypatch.setattr(profiler, 'backend_name', lambda table: 'mssql')
+    monkeypatch.setattr(profiler, '_metric_support', {})
+    stats, row_count = profile_column_batch(table, table.columns, [0, 1], include_row_count=True)
+
+    assert row_count == 10
+    assert stats['id']['mean'] == 4.5
+    assert 'median' not in stats['id']
+    assert stats['code']['max_length'] == 1
+    assert not {'min_value', 'max_value', 'min_key', 'max_key'} & set(stats['code'])
+
+def test_empty_table_has_zero_counts():
+    con = ibis.duckdb.connect()
+    table = con.sql("SELECT range AS id, CAST(range AS VARCHAR) AS code FROM range(0)")
+    stats, row_count = profile_column_batch(
+        table, table.columns, [0, 1], include_row_count=True, count_singletons=True
+    )
+
+    assert row_count == 0
+    assert stats['id']['null_count'] == 0
+    assert stats['code']['unique_count'] == 0
+    assert stats['code']['blank_count'] == 0
+    assert stats['code']['singleton_count'] == 0
+
+def test_sample_is_unseeded_where_the_backend_cannot_seed(monkeypatch):
+    import profiler
+    con = ibis.duckdb.connect()
+    table = con.sql("SELECT range AS id FROM range(1000)")
+
+    sample, repeatable = profiler.sample_table(con, table, 'bernoulli', 0.5, 1000)
+    assert repeatable
+    assert sample.count().execute() == sample.count().execute()
+
+    monkeypatch.setattr(profiler, 'backend_name', lambda table: 'mssql')
+    mssql = SimpleNamespace(name='mssql')
+    for method, size in (('bernoulli', 0.5), ('reservoir', 100)):
+        sample, repeatable = profiler.sample_table(mssql, table, method, size, 1000)
+        assert not repeatable
+        ibis.to_sql(sample, dialect='mssql')
+
+def test_incremental_profile_recomputes_the_median(tmp_path, monkeypatch):
+    import pandas as pd
+    from profiler import generate_profile
+    monkeypatch.chdir(tmp_path)
+    progress = SimpleNamespace(progress=lambda *args: None)
+    con = ibis.duckdb.connect(str(tmp_path / 'source.duckdb'))
+    con.raw_sql("CREATE TABLE orders AS SELECT range AS id, 7.0::DOUBLE AS amount FROM range(900)")
+
+    def median():
+        summary = pd.read_parquet(tmp_path / 'data_profiles' / 'source' / 'main' / 'orders' / 'summary.parquet')
+        return summary.set_index('column_name').loc['amount', 'median']
+
+    assert generate_profile(con, 'main', 'orders', progress, 'source', watermark_column='id')[0]
+    con.raw_sql("INSERT INTO orders SELECT range + 900, 10000.0 FROM range(100)")
+    assert generate_profile(con, 'main', 'orders', progress, 'source', watermark_column='id')[0]
+
+    assert median() == 7.0
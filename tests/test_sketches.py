@@ -0,0 +1,31 @@
+import ibis
+import pytest
+from sketches import hll_registers, hll_estimate, hll_merge
+
+# Three standard errors of the default precision
+TOLERANCE = 0.05
+
+@pytest.fixture(scope="module")
+def con():
+    return ibis.duckdb.connect()
+
+@pytest.mark.parametrize("distinct", [10_000, 100_000, 1_000_000])
+def test_estimate_matches_distinct_count(con, distinct):
+    table = con.sql(f"""
+        SELECT range AS int_col, 'v' || (range % {distinct}) AS str_col, range * 0.5 AS float_col
+        FROM range({2 * distinct})
+    """)
+    exact = {
+        'int_col': 2 * distinct,
+        'str_col': distinct,
+        'float_col': 2 * distinct
+    }
+    registers = hll_registers(table, list(exact))
+    for col, count in exact.items():
+        assert hll_estimate(registers[col]) == pytest.approx(count, rel=TOLERANCE), col
+
+def test_merged_estimate_matches_distinct_count(con):
+    first = con.sql("SELECT range AS a FROM range(0, 60000)")
+    second = con.sql("SELECT range AS a FROM range(40000, 100000)")
+    merged = hll_merge([hll_registers(first, ['a'])['a'], hll_registers(second, ['a'])['a']])
+    assert hll_estimate(merged) == pytest.approx(100_000, rel=TOLERANCE)